@@ -0,0 +1,114 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent prediction requests for one battery into a single batch.
+
+    Callers `submit` one item and await its result. A worker task collects queued
+    items until either `max_batch_size` items are waiting or `max_wait_ms` has
+    passed since the first item arrived, then runs `predict_fn` once on the whole
+    batch and hands each caller its own result.
+
+    Args:
+        predict_fn (callable): Takes a list of items and returns a sequence of
+                               results in the same order.
+        max_batch_size (int): Maximum number of items per model call.
+        max_wait_ms (float): Maximum time to hold the first item while waiting
+                             for more to arrive.
+        executor (Executor, optional): Runs `predict_fn` off the event loop. When
+                                       None, the loop's default executor is used.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int, max_wait_ms: float, executor=None):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+        # Metrics
+        self.batches_processed = 0
+        self.items_processed = 0
+        self.last_batch_size = 0
+        self.max_batch_size_observed = 0
+        self.batch_size_counts = {}
+
+    def _ensure_worker(self):
+        """Starts the worker on the running loop (again if the previous loop went away)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queues one item and waits for its prediction."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self):
+        """Waits for the first item, then gathers more until the size or time limit is hit."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            # Drop callers that have already given up (e.g. client disconnected)
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self._record_batch(len(batch))
+            try:
+                results = await self._predict([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _predict(self, items):
+        return await self._loop.run_in_executor(self.executor, self.predict_fn, items)
+
+    def _record_batch(self, size: int):
+        self.batches_processed += 1
+        self.items_processed += size
+        self.last_batch_size = size
+        self.max_batch_size_observed = max(self.max_batch_size_observed, size)
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+
+    def stats(self):
+        """Returns queue depth and batch size metrics."""
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batches_processed': self.batches_processed,
+            'requests_processed': self.items_processed,
+            'last_batch_size': self.last_batch_size,
+            'mean_batch_size': round(self.items_processed / self.batches_processed, 2) if self.batches_processed else 0.0,
+            'max_batch_size_observed': self.max_batch_size_observed,
+            'batch_size_counts': dict(sorted(self.batch_size_counts.items())),
+        }
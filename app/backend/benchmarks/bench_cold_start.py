@@ -0,0 +1,93 @@
+"""
+Cold-start benchmark: starts `python main.py` and measures, from process
+start, when /health/live answers, when /health/ready turns 200 and the
+time to first prediction of every battery (since start, and the latency of
+that first request). Runs once without warm-up (batteries load on their
+first request) and once with PRELOAD_BATTERIES set to the same batteries.
+After readiness the server precomputes the preloaded batteries' cycle
+summaries in the background; on few CPUs that competes with the first
+requests unless --settle waits for it.
+
+Usage (from app/backend, with MODEL_DIR and DATA_DIR set):
+    python benchmarks/bench_cold_start.py --batteries B0018 --output results/cold_start.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import BACKEND_DIR, run_metadata, write_results  # noqa: E402
+
+
+def wait_for(client, path, start, timeout_s, poll_s=0.02):
+    """Polls `path` until it returns 200; returns the seconds since `start`."""
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(poll_s)
+    raise TimeoutError(f"{path} did not return 200 within {timeout_s}s")
+
+
+def run_scenario(args, warmup):
+    env = dict(os.environ, PORT=str(args.port), WEB_CONCURRENCY="1", TF_CPP_MIN_LOG_LEVEL="3", LOG_LEVEL="WARNING",
+               PRELOAD_BATTERIES=",".join(args.batteries) if warmup else "", PREDICTION_CACHE_SIZE="0")
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout) as client:
+            result = {'live_s': round(wait_for(client, "/health/live", start, args.timeout), 4)}
+            result['ready_s'] = round(wait_for(client, "/health/ready", start, args.timeout), 4)
+            time.sleep(args.settle)
+            result['first_prediction'] = {}
+            for battery_id in args.batteries:
+                # A fixed cycle: looking one up through the API would load the battery before the timed request
+                request_start = time.perf_counter()
+                response = client.post(f"/predict/soh/{battery_id}", json={"cycle_number": args.cycle})
+                response.raise_for_status()
+                done = time.perf_counter()
+                result['first_prediction'][battery_id] = {
+                    'request_s': round(done - request_start, 4),
+                    'since_start_s': round(done - start, 4),
+                }
+                second_start = time.perf_counter()
+                client.post(f"/predict/soh/{battery_id}", json={"cycle_number": args.cycle}).raise_for_status()
+                result['first_prediction'][battery_id]['second_request_s'] = round(time.perf_counter() - second_start, 4)
+            result['server_report'] = client.get("/health/ready").json()
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batteries', nargs='+', default=['B0018'])
+    parser.add_argument('--cycle', type=int, default=3, help="Cycle predicted first (must exist for every battery)")
+    parser.add_argument('--settle', type=float, default=0.0, help="Seconds to wait after readiness before predicting")
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--timeout', type=float, default=180.0)
+    parser.add_argument('--output', help="JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'metadata': run_metadata('cold_start', args), 'scenarios': {}}
+    for name, warmup in (('no_warmup', False), ('warmup', True)):
+        scenario = results['scenarios'][name] = run_scenario(args, warmup)
+        print(f"{name:>10}: live {scenario['live_s']:6.2f}s, ready {scenario['ready_s']:6.2f}s", file=sys.stderr)
+        for battery_id, first in scenario['first_prediction'].items():
+            print(f"{'':>10}  {battery_id}: first prediction {first['request_s'] * 1e3:9.1f} ms "
+                  f"({first['since_start_s']:.2f}s after start), second {first['second_request_s'] * 1e3:7.1f} ms",
+                  file=sys.stderr)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Shared helpers of the JSON-emitting benchmarks (bench_suite.py, bench_load.py):
+latency summaries, run metadata and result files.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend settings recorded with every run, so results of different configurations can be told apart
+CONFIG_VARIABLES = [
+    'INFERENCE_ENGINE', 'INFERENCE_WORKERS', 'LOADING_WORKERS', 'MICRO_BATCH_MAX_SIZE', 'MICRO_BATCH_MAX_WAIT_MS',
+    'PREPAD_SEQUENCES', 'LENGTH_AWARE_INFERENCE', 'LENGTH_BUCKET_SIZE', 'PREDICTION_CACHE_SIZE',
+    'REGISTRY_MAX_BATTERIES', 'REGISTRY_MAX_MEMORY_MB', 'DEFAULT_PREDICTION_ENGINE', 'TREE_MODEL',
+    'PRELOAD_BATTERIES', 'WARMUP_MODELS',
+]
+
+
+def latency_summary(latencies_ms):
+    """Summarizes latencies (milliseconds) as count, mean, min/max and p50/p95/p99."""
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    if len(latencies) == 0:
+        return {'count': 0}
+    return {
+        'count': int(len(latencies)),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'min_ms': round(float(latencies.min()), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'max_ms': round(float(latencies.max()), 4),
+    }
+
+
+def time_calls(func, args_list, repeats=1, warmup=True):
+    """Calls `func(*args)` for every args tuple, `repeats` times, and returns the latencies in ms."""
+    if warmup and args_list:
+        func(*args_list[0])
+    latencies = []
+    for _ in range(repeats):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            latencies.append((time.perf_counter() - start) * 1e3)
+    return latencies
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(benchmark, args):
+    """Describes a run: benchmark, arguments, code revision, configuration and machine."""
+    return {
+        'benchmark': benchmark,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_revision': git_revision(),
+        'arguments': vars(args),
+        'config': {name: os.environ[name] for name in CONFIG_VARIABLES if name in os.environ},
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(results, path):
+    """Writes results as JSON to `path`, or to stdout when `path` is None or '-'."""
+    text = json.dumps(results, indent=2)
+    if path in (None, '-'):
+        print(text)
+        return
+    with open(path, 'w') as f:
+        f.write(text + '\n')
+    print(f"Results written to {path}")
@@ -0,0 +1,90 @@
+"""
+Compares the "fast" prediction engine (cycle-level tree model, every cycle
+scored at load time) with the LSTM: per-cycle and whole-battery prediction
+latency, load cost and accuracy against the actual SoH of every cycle.
+
+Only batteries with a tree model in MODEL_DIR (random_forest_<id>_soh_cycle_v1.pkl
+with its imputer and scaler; TREE_MODEL=xgboost for the XGBoost model) can be compared.
+
+Usage (from app/backend, with MODEL_DIR and DATA_DIR set):
+    python benchmarks/bench_fast_engine.py --batteries B0005 --output results/fast_engine.json
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import latency_summary, time_calls, run_metadata, write_results  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+from data_store import load_battery_columns, cycle_soh  # noqa: E402
+
+
+def accuracy(predicted, actual):
+    errors = np.asarray(predicted) - np.asarray(actual)
+    errors = errors[~np.isnan(errors)]
+    return {
+        'mae': round(float(np.abs(errors).mean()), 6),
+        'rmse': round(float(np.sqrt((errors ** 2).mean())), 6),
+        'max_abs_error': round(float(np.abs(errors).max()), 6),
+    }
+
+
+def bench_battery(battery_id, repeats):
+    bundle = main.load_resources_sync(battery_id)
+    if bundle.tree_engine is None:
+        raise SystemExit(f"{battery_id} has no {main.TREE_MODEL} model in {main.MODEL_DIR}")
+    cycles = [int(c) for c in bundle.cycle_index.cycles]
+
+    start = time.perf_counter()
+    main.load_tree_engine(battery_id, bundle.data)
+    tree_load_ms = (time.perf_counter() - start) * 1e3
+
+    columns, _, _ = load_battery_columns(main.DATA_DIR, battery_id, columns=['cycle_number', 'soh'])
+    soh_by_cycle = dict(zip(*(values.tolist() for values in cycle_soh(columns))))
+    actual = [soh_by_cycle.get(c, np.nan) for c in cycles]
+
+    results = {'cycles': len(cycles), 'fast_engine_load_ms': round(tree_load_ms, 3)}
+    predictions = {}
+    for engine in ('lstm', 'fast'):
+        single = time_calls(main.predict_cycles, [(bundle, [c], "single", engine) for c in cycles], repeats)
+        whole = time_calls(main.predict_cycles, [(bundle, cycles, "batch", engine)], repeats)
+        predictions[engine] = main.predict_cycles(bundle, cycles, "batch", engine)
+        results[engine] = {
+            'single_cycle': latency_summary(single),
+            'all_cycles': latency_summary(whole),
+            'accuracy': accuracy(predictions[engine], actual),
+        }
+    results['speedup_single_p50'] = round(results['lstm']['single_cycle']['p50_ms'] /
+                                          results['fast']['single_cycle']['p50_ms'], 1)
+    results['speedup_all_cycles_p50'] = round(results['lstm']['all_cycles']['p50_ms'] /
+                                              results['fast']['all_cycles']['p50_ms'], 1)
+    results['fast_vs_lstm'] = accuracy(predictions['fast'], predictions['lstm'])
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batteries', nargs='+', default=['B0005'])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'metadata': run_metadata('fast_engine', args), 'batteries': {}}
+    for battery_id in args.batteries:
+        result = results['batteries'][battery_id] = bench_battery(battery_id, args.repeats)
+        for engine in ('lstm', 'fast'):
+            print(f"{battery_id} {engine:>4}: single cycle p50 {result[engine]['single_cycle']['p50_ms']:9.4f} ms, "
+                  f"all {result['cycles']} cycles p50 {result[engine]['all_cycles']['p50_ms']:9.3f} ms, "
+                  f"MAE {result[engine]['accuracy']['mae']:.4f}", file=sys.stderr)
+        print(f"{battery_id}: fast engine {result['speedup_single_p50']}x faster per cycle, "
+              f"built in {result['fast_engine_load_ms']:.1f} ms at load", file=sys.stderr)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main_cli()
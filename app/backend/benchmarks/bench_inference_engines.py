@@ -0,0 +1,105 @@
+"""
+Parity check and startup/latency benchmark of the Keras and NumPy inference
+engines. Run export_models.py first so the .npz weights exist.
+
+Usage (from app/backend):
+    python benchmarks/bench_inference_engines.py --battery B0018
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from main import MODEL_DIR, DATA_DIR, MAX_SEQ_LENGTHS, SEQUENCE_FEATURES  # noqa: E402
+from cycle_index import CycleIndex  # noqa: E402
+from data_store import load_battery_columns  # noqa: E402
+from lean_lstm import NumpyLSTMModel  # noqa: E402
+
+# Measures a fresh process: importing the backend and loading one battery
+STARTUP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+bundle = main.load_resources_sync(sys.argv[1])
+loaded = time.perf_counter()
+bundle.model.predict(main.build_batch(bundle, [int(bundle.cycle_index.cycles[0])]), verbose=0)
+first_prediction = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "load_s": loaded - imported,
+                  "first_predict_s": first_prediction - loaded, "total_s": first_prediction - start}))
+"""
+
+
+def measure_startup(engine, battery_id):
+    env = dict(os.environ, INFERENCE_ENGINE=engine, TF_CPP_MIN_LOG_LEVEL="3")
+    output = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET, battery_id], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_predictions(model, batches, repeats):
+    """Returns per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeats):
+        for batch in batches:
+            start = time.perf_counter()
+            model.predict(batch, verbose=0)
+            latencies.append((time.perf_counter() - start) * 1e3)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--battery', default='B0018')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=1e-4, help="Max allowed |keras - numpy| prediction difference")
+    args = parser.parse_args()
+
+    from tensorflow import keras
+
+    battery_id = args.battery
+    max_len = MAX_SEQ_LENGTHS[battery_id]
+    keras_model = keras.models.load_model(os.path.join(MODEL_DIR, f'lstm_final_{battery_id}_soh.keras'))
+    numpy_model = NumpyLSTMModel.load(os.path.join(MODEL_DIR, f'lstm_final_{battery_id}_soh.npz'))
+    with open(os.path.join(MODEL_DIR, f'scaler_lstm_{battery_id}_soh.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    data, offsets, _ = load_battery_columns(DATA_DIR, battery_id)
+    offsets = offsets or {}
+    index = CycleIndex.from_columns(data, SEQUENCE_FEATURES, scaler=scaler, max_len=max_len,
+                                    cycles=offsets.get('index_cycles'), offsets=offsets.get('index_offsets'))
+    cycles = [int(c) for c in index.cycles]
+    full_batch = index.batch(cycles, max_len)
+
+    # Parity over every cycle of the battery
+    keras_pred = keras_model.predict(full_batch, verbose=0)
+    numpy_pred = numpy_model.predict(full_batch)
+    max_diff = float(np.max(np.abs(keras_pred - numpy_pred)))
+    print(f"Battery {battery_id}: {len(cycles)} cycles, max |keras - numpy| = {max_diff:.2e}")
+    if max_diff > args.tolerance:
+        raise SystemExit(f"Parity check failed: {max_diff:.2e} > tolerance {args.tolerance:.0e}")
+
+    # Latency: batch of one (typical single request) and the full history in one call
+    singles = [index.batch([c], max_len) for c in cycles[:50]]
+    for name, model in [("keras", keras_model), ("numpy", numpy_model)]:
+        model.predict(singles[0], verbose=0) # Warm-up (graph tracing for Keras)
+        single = time_predictions(model, singles, args.repeats)
+        full = time_predictions(model, [full_batch], args.repeats)
+        print(f"{name:<6} batch-of-1 p50 {np.percentile(single, 50):7.2f} ms  p99 {np.percentile(single, 99):7.2f} ms | "
+              f"full batch ({len(cycles)}) {full.mean():7.2f} ms")
+
+    # Startup: fresh process, import + load + first prediction
+    for engine in ("keras", "numpy"):
+        startup = measure_startup(engine, battery_id)
+        print(f"{engine:<6} startup: import {startup['import_s']:.2f}s, load {startup['load_s']:.2f}s, "
+              f"first predict {startup['first_predict_s']:.2f}s, total {startup['total_s']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compares full-padding inference with length-aware inference (true-length
+NumPy forward pass, length-bucketed Keras batches) over every cycle of each
+battery, and reports the cycle-length distribution that drives the savings.
+Single-cycle requests are timed on cycles sampled evenly across the length
+distribution and reported per length quantile bin.
+
+Usage (from app/backend):
+    python benchmarks/bench_length_aware.py --batteries B0018 --engines numpy keras
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+
+
+def timed(func, repeats):
+    """Returns (result of the last call, mean wall time in ms) after one untimed warm-up call."""
+    func() # Keras traces each new input shape on first use
+    elapsed = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed.append((time.perf_counter() - start) * 1e3)
+    return result, float(np.mean(elapsed))
+
+
+def length_sample(cycles, lengths, n):
+    """Returns `n` cycles at evenly spaced quantiles of the cycle length (shortest first) and their lengths."""
+    order = np.argsort(lengths, kind='stable')
+    picks = order[np.unique(np.linspace(0, len(order) - 1, min(n, len(order))).round().astype(np.int64))]
+    return [cycles[i] for i in picks], lengths[picks]
+
+
+def run_engine(engine, battery_id, args):
+    main.INFERENCE_ENGINE = engine
+    bundle = main.load_resources_sync(battery_id)
+    max_len = main.MAX_SEQ_LENGTHS[battery_id]
+    cycles = [int(c) for c in bundle.cycle_index.cycles]
+    lengths = bundle.cycle_index.lengths_of(cycles, max_len)
+    single_cycles, single_lengths = length_sample(cycles, lengths, args.singles)
+
+    results = {}
+    for length_aware in (False, True):
+        main.LENGTH_AWARE_INFERENCE = length_aware
+        full, full_ms = timed(lambda: main.predict_cycles(bundle, cycles), args.repeats)
+        singles_ms = []
+        for cycle_number in single_cycles:
+            _, ms = timed(lambda: main.predict_cycles(bundle, [cycle_number]), args.repeats)
+            singles_ms.append(ms)
+        results[length_aware] = (np.array(full), full_ms, np.array(singles_ms))
+
+    padded, aware = results[False], results[True]
+    max_diff = float(np.max(np.abs(padded[0] - aware[0])))
+    print(f"{battery_id} [{engine}] cycle length min/median/max {lengths.min()}/{int(np.median(lengths))}/{lengths.max()} "
+          f"of {max_len} padded steps ({1 - lengths.sum() / (len(cycles) * max_len):.0%} padding)")
+    print(f"  full history ({len(cycles)} cycles): padded {padded[1]:8.2f} ms, length-aware {aware[1]:8.2f} ms "
+          f"({padded[1] / aware[1]:.2f}x)")
+    print(f"  single cycle (mean of {len(single_cycles)} across lengths): padded {padded[2].mean():8.2f} ms, "
+          f"length-aware {aware[2].mean():8.2f} ms ({padded[2].mean() / aware[2].mean():.2f}x)")
+    # The sample is sorted by length, so equal splits are length quantile bins
+    for positions in np.array_split(np.arange(len(single_cycles)), min(args.length_bins, len(single_cycles))):
+        padded_ms, aware_ms = padded[2][positions].mean(), aware[2][positions].mean()
+        print(f"    length {single_lengths[positions].min():>4}-{single_lengths[positions].max():<4} "
+              f"({len(positions)} cycles): padded {padded_ms:8.2f} ms, length-aware {aware_ms:8.2f} ms "
+              f"({padded_ms / aware_ms:.2f}x)")
+    print(f"  max |padded - length-aware| = {max_diff:.2e}")
+    if max_diff > args.tolerance:
+        raise SystemExit(f"Predictions differ by {max_diff:.2e} > tolerance {args.tolerance:.0e}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batteries', nargs='+', default=['B0018'])
+    parser.add_argument('--engines', nargs='+', default=['numpy', 'keras'], choices=['numpy', 'keras'])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--singles', type=int, default=20,
+                        help="Cycles timed as batch-of-one requests, sampled evenly across cycle lengths")
+    parser.add_argument('--length-bins', type=int, default=4, help="Length quantile bins of the single-cycle report")
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    for battery_id in args.batteries:
+        for engine in args.engines:
+            run_engine(engine, battery_id, args)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,146 @@
+"""
+Async load generator for the prediction API. Runs a fixed number of requests
+at each concurrency level and reports p50/p95/p99 latency, requests/sec and
+errors as JSON.
+
+Targets the FastAPI app in-process (default, no network) or a running server
+(--url, e.g. a local `uvicorn main:app`). In-process runs also record the
+micro-batching and result cache metrics of each level.
+
+Usage (from app/backend, with MODEL_DIR and DATA_DIR set):
+    python benchmarks/bench_load.py --battery B0018 --concurrency 1 8 32 --requests 500 --output results/load.json
+    python benchmarks/bench_load.py --url http://localhost:5000 --scenario batch --batch-size 16
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_common import latency_summary, run_metadata, write_results  # noqa: E402
+
+
+def make_request(client, args, cycles, rng):
+    """Returns the coroutine of one request of the configured scenario."""
+    if args.scenario == 'batch':
+        return client.post(f"/predict/soh/{args.battery}/batch",
+                           json={"cycle_numbers": rng.sample(cycles, min(args.batch_size, len(cycles)))})
+    return client.post(f"/predict/soh/{args.battery}", json={"cycle_number": rng.choice(cycles)})
+
+
+async def run_level(client, args, cycles, concurrency, n_requests, seed):
+    """Sends `n_requests` with `concurrency` requests in flight; returns latencies (ms), status counts and wall time."""
+    rng = random.Random(seed)
+    latencies, statuses = [], {}
+    remaining = n_requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, args, cycles, rng)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1e3)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def batching_snapshot(app_main):
+    return {} if app_main is None else {b: batcher.stats() for b, batcher in app_main.batchers.items()}
+
+
+def batching_delta(before, after):
+    """Micro-batching activity between two snapshots: model calls, requests and batch sizes."""
+    delta = {}
+    for battery_id, stats in after.items():
+        previous = before.get(battery_id, {})
+        batches = stats['batches_processed'] - previous.get('batches_processed', 0)
+        requests = stats['requests_processed'] - previous.get('requests_processed', 0)
+        counts = {size: count - previous.get('batch_size_counts', {}).get(size, 0)
+                  for size, count in stats['batch_size_counts'].items()}
+        delta[battery_id] = {
+            'batches_processed': batches,
+            'requests_processed': requests,
+            'mean_batch_size': round(requests / batches, 2) if batches else 0.0,
+            'batch_size_counts': {size: count for size, count in counts.items() if count},
+        }
+    return delta
+
+
+async def discover_cycles(client, battery_id):
+    """Fetches the battery's cycle numbers (scoring every cycle once, which also loads the battery)."""
+    response = await client.post(f"/predict/soh/{battery_id}/batch", json={}, timeout=600)
+    response.raise_for_status()
+    return [p["cycle_number"] for p in response.json()["predictions"]]
+
+
+async def run(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        app_main = None
+    else:
+        import main as app_main
+        if args.no_result_cache:
+            app_main.result_cache.max_entries = 0
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_main.app), base_url="http://bench",
+                                   timeout=args.timeout)
+
+    levels = []
+    async with client:
+        cycles = await discover_cycles(client, args.battery)
+        await run_level(client, args, cycles, max(args.concurrency), args.warmup, seed=-1)
+
+        for concurrency in args.concurrency:
+            batching_before = batching_snapshot(app_main)
+            latencies, statuses, wall_time = await run_level(client, args, cycles, concurrency, args.requests, seed=concurrency)
+            level = {
+                'concurrency': concurrency,
+                'requests': len(latencies),
+                'wall_time_s': round(wall_time, 4),
+                'requests_per_s': round(len(latencies) / wall_time, 2) if wall_time else None,
+                'latency': latency_summary(latencies),
+                'status_counts': statuses,
+            }
+            if app_main is not None:
+                level['batching'] = batching_delta(batching_before, batching_snapshot(app_main))
+                level['prediction_cache'] = app_main.result_cache.stats()
+            levels.append(level)
+            print(f"concurrency {concurrency:>4}: {level['requests_per_s']:>9} req/s, p50 {level['latency']['p50_ms']:8.2f} ms, "
+                  f"p95 {level['latency']['p95_ms']:8.2f} ms, p99 {level['latency']['p99_ms']:8.2f} ms, statuses {statuses}",
+                  file=sys.stderr)
+    return {'target': args.url or 'in-process', 'cycles': len(cycles), 'levels': levels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--battery', default='B0018')
+    parser.add_argument('--url', help="Base URL of a running server (default: the app in-process)")
+    parser.add_argument('--scenario', choices=['single', 'batch'], default='single')
+    parser.add_argument('--batch-size', type=int, default=16, help="Cycles per request in the batch scenario")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=300, help="Requests per concurrency level")
+    parser.add_argument('--warmup', type=int, default=50, help="Untimed requests before the first level")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help="In-process only: disable the prediction result cache so every request runs the model")
+    parser.add_argument('--output', help="JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'metadata': run_metadata('load', args)}
+    results.update(asyncio.run(run(args)))
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of per-request preprocessing: the original DataFrame scan
+(boolean mask + copy + scaler.transform + pad_sequences) versus a lookup in the
+load-time CycleIndex.
+
+Usage (from app/backend):
+    python benchmarks/bench_preprocessing.py --battery B0018 --repeats 5
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from keras.preprocessing.sequence import pad_sequences
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import MODEL_DIR, DATA_DIR, MAX_SEQ_LENGTHS, SEQUENCE_FEATURES  # noqa: E402
+from cycle_index import CycleIndex  # noqa: E402
+
+
+def preprocess_dataframe(df_battery, scaler, cycle_number, max_len):
+    """The per-request path used before the cycle index existed."""
+    cycle_data = df_battery[df_battery['cycle_number'] == cycle_number].copy()
+    sequence = cycle_data[SEQUENCE_FEATURES].values
+    sequence_scaled = scaler.transform(sequence)
+    sequence_reshaped = sequence_scaled.reshape(1, sequence.shape[0], sequence.shape[1])
+    return pad_sequences(sequence_reshaped, maxlen=max_len, padding='post', dtype='float32', value=0.0)
+
+
+def time_per_call(func, cycles, repeats):
+    """Returns per-call latencies in microseconds over `repeats` passes of every cycle."""
+    latencies = []
+    for _ in range(repeats):
+        for cycle_number in cycles:
+            start = time.perf_counter()
+            func(cycle_number)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    return np.array(latencies)
+
+
+def summarize(name, latencies):
+    print(f"{name:<28} mean {latencies.mean():9.1f} us   p50 {np.percentile(latencies, 50):9.1f} us   "
+          f"p99 {np.percentile(latencies, 99):9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--battery', default='B0018')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    battery_id = args.battery
+    max_len = MAX_SEQ_LENGTHS[battery_id]
+    with open(os.path.join(MODEL_DIR, f'scaler_lstm_{battery_id}_soh.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    df_battery = pd.read_csv(os.path.join(DATA_DIR, f'optimized_nasa_battery_data_{battery_id}_preprocessed.csv'))
+
+    start = time.perf_counter()
+    index_prepadded = CycleIndex.from_columns(df_battery, SEQUENCE_FEATURES, scaler=scaler, max_len=max_len)
+    build_ms = (time.perf_counter() - start) * 1e3
+    index_sliced = CycleIndex(index_prepadded.cycles, index_prepadded.offsets, index_prepadded.values)
+    cycles = [int(c) for c in index_prepadded.cycles]
+
+    # Both index paths must produce exactly what the DataFrame path produces
+    for cycle_number in cycles:
+        expected = preprocess_dataframe(df_battery, scaler, cycle_number, max_len)
+        assert np.array_equal(expected, index_prepadded.batch([cycle_number], max_len)), cycle_number
+        assert np.array_equal(expected, index_sliced.batch([cycle_number], max_len)), cycle_number
+
+    print(f"Battery {battery_id}: {len(df_battery)} rows, {len(cycles)} cycles, max_len {max_len}")
+    print(f"Index build time: {build_ms:.1f} ms (one-off, at load)")
+    baseline = time_per_call(lambda c: preprocess_dataframe(df_battery, scaler, c, max_len), cycles, args.repeats)
+    sliced = time_per_call(lambda c: index_sliced.batch([c], max_len), cycles, args.repeats)
+    prepadded = time_per_call(lambda c: index_prepadded.batch([c], max_len), cycles, args.repeats)
+    summarize("DataFrame scan (before)", baseline)
+    summarize("Index slice + pad", sliced)
+    summarize("Index pre-padded", prepadded)
+    print(f"Speed-up (pre-padded vs before): {baseline.mean() / prepadded.mean():.0f}x")
+
+
+if __name__ == '__main__':
+    main()
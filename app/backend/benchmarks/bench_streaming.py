@@ -0,0 +1,86 @@
+"""
+Replays discharge cycles sample-chunk by sample-chunk through the streaming
+estimator and compares it with reprocessing the whole cycle after every chunk
+(smooth -> scale -> full forward pass). Every streaming estimate is checked
+against the offline pipeline applied to the samples received so far.
+
+The processed data only holds smoothed signals, so raw telemetry is simulated
+by adding sensor noise to them. Requires scipy (used by the offline pipeline).
+
+Usage (from app/backend):
+    python benchmarks/bench_streaming.py --battery B0018 --chunk-size 10
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import MODEL_DIR, DATA_DIR, MAX_SEQ_LENGTHS, SEQUENCE_FEATURES  # noqa: E402
+from cycle_index import CycleIndex  # noqa: E402
+from data_store import load_battery_columns  # noqa: E402
+from lean_lstm import NumpyLSTMModel  # noqa: E402
+from streaming import CycleStream, SMOOTHING_WINDOW, SMOOTHING_POLYORDER  # noqa: E402
+
+
+def offline_estimate(model, scaler, raw, max_len):
+    """Preprocesses the cycle received so far like scripts/data_utils.py and scores it."""
+    rows = raw.copy()
+    if len(rows) >= SMOOTHING_WINDOW:
+        for col in range(3):
+            rows[:, col] = savgol_filter(rows[:, col], SMOOTHING_WINDOW, SMOOTHING_POLYORDER, mode='interp')
+    scaled = scaler.transform(rows).astype(np.float32)[-max_len:]
+    return float(model.predict(scaled[np.newaxis], lengths=[len(scaled)])[0, 0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--battery', default='B0018')
+    parser.add_argument('--cycles', type=int, default=10, help="Number of cycles to replay")
+    parser.add_argument('--chunk-size', type=int, default=10, help="Samples per chunk")
+    parser.add_argument('--noise', type=float, default=0.01, help="Relative sensor noise added to the smoothed signals")
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    model = NumpyLSTMModel.load(os.path.join(MODEL_DIR, f'lstm_final_{args.battery}_soh.npz'))
+    with open(os.path.join(MODEL_DIR, f'scaler_lstm_{args.battery}_soh.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    max_len = MAX_SEQ_LENGTHS[args.battery]
+    columns, index, _ = load_battery_columns(DATA_DIR, args.battery, columns=['cycle_number', *SEQUENCE_FEATURES])
+    cycle_index = CycleIndex.from_columns(columns, SEQUENCE_FEATURES, **({} if index is None else {
+        'cycles': index['index_cycles'], 'offsets': index['index_offsets']}))
+
+    rng = np.random.default_rng(0)
+    streaming_ms, offline_ms, max_diff, n_chunks = 0.0, 0.0, 0.0, 0
+    for cycle_number in cycle_index.cycles[:args.cycles]:
+        raw = np.array(cycle_index.get(int(cycle_number)), dtype=np.float64)
+        raw[:, :3] *= 1 + args.noise * rng.standard_normal((len(raw), 3))
+
+        stream = CycleStream(model, scaler, max_len)
+        for start in range(0, len(raw), args.chunk_size):
+            chunk = raw[start:start + args.chunk_size]
+            t0 = time.perf_counter()
+            stream.add(*chunk.T)
+            streamed = stream.estimate()
+            t1 = time.perf_counter()
+            offline = offline_estimate(model, scaler, raw[:start + len(chunk)], max_len)
+            t2 = time.perf_counter()
+            streaming_ms += (t1 - t0) * 1e3
+            offline_ms += (t2 - t1) * 1e3
+            max_diff = max(max_diff, abs(streamed - offline))
+            n_chunks += 1
+
+    print(f"{args.battery}: {n_chunks} chunks of {args.chunk_size} samples over {min(args.cycles, len(cycle_index))} cycles")
+    print(f"  per chunk: streaming {streaming_ms / n_chunks:7.3f} ms, reprocess whole cycle {offline_ms / n_chunks:7.3f} ms "
+          f"({offline_ms / streaming_ms:.1f}x)")
+    print(f"  max |streaming - offline| = {max_diff:.2e}")
+    if max_diff > args.tolerance:
+        raise SystemExit(f"Streaming estimates differ by {max_diff:.2e} > tolerance {args.tolerance:.0e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Reproducible micro-benchmarks of the prediction path, per battery and engine,
+emitted as JSON:
+
+- cycle lookup in the CycleIndex, scaler.transform of one cycle, padding one
+  cycle (keras pad_sequences vs. the index's pad_cycles) and model.predict for
+  a single cycle and the full history;
+- resource loading: cold (fresh process: imports + first load) versus warm
+  (reload in a process whose imports and file cache are already warm) versus
+  resident (registry hit).
+
+Usage (from app/backend, with MODEL_DIR and DATA_DIR set):
+    python benchmarks/bench_suite.py --batteries B0018 --output results/suite.json
+    python benchmarks/compare_results.py results/before.json results/after.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+from bench_common import BACKEND_DIR, latency_summary, time_calls, run_metadata, write_results  # noqa: E402
+from cycle_index import CycleIndex, pad_cycles  # noqa: E402
+from data_store import load_battery_columns  # noqa: E402
+
+# Fresh process: import the backend, load one battery and predict once
+COLD_LOAD_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+bundle = main.load_resources_sync(sys.argv[1])
+loaded = time.perf_counter()
+main.predict_cycles(bundle, [int(bundle.cycle_index.cycles[0])])
+predicted = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1e3, "load_ms": (loaded - imported) * 1e3,
+                  "first_predict_ms": (predicted - loaded) * 1e3, "total_ms": (predicted - start) * 1e3}))
+"""
+
+
+def available_engines(battery_id):
+    engines = []
+    for engine, extension in (("keras", "keras"), ("numpy", "npz")):
+        if os.path.exists(os.path.join(main.MODEL_DIR, f'lstm_final_{battery_id}_soh.{extension}')):
+            engines.append(engine)
+    return engines
+
+
+def bench_preprocessing(battery_id, bundle, repeats, sample_cycles):
+    """Per-cycle lookup, scaling and padding latencies."""
+    from keras.preprocessing.sequence import pad_sequences
+
+    max_len = main.MAX_SEQ_LENGTHS[battery_id]
+    columns, index, _ = load_battery_columns(main.DATA_DIR, battery_id, columns=['cycle_number', *main.SEQUENCE_FEATURES])
+    unscaled = CycleIndex.from_columns(columns, main.SEQUENCE_FEATURES, **({} if index is None else {
+        'cycles': index['index_cycles'], 'offsets': index['index_offsets']}))
+    cycle_index = bundle.cycle_index
+    cycles = [(int(c),) for c in cycle_index.cycles[:sample_cycles]]
+    raw_cycles = [(np.asarray(unscaled.get(c), dtype=np.float64),) for (c,) in cycles]
+    scaled_cycles = [(cycle_index.get(c)[np.newaxis],) for (c,) in cycles]
+    positions = [([cycle_index.positions[c]],) for (c,) in cycles]
+
+    return {
+        'cycle_lookup': latency_summary(time_calls(cycle_index.get, cycles, repeats)),
+        'scaler_transform': latency_summary(time_calls(bundle.scaler.transform, raw_cycles, repeats)),
+        'pad_sequences': latency_summary(time_calls(
+            lambda x: pad_sequences(x, maxlen=max_len, padding='post', dtype='float32', value=0.0), scaled_cycles, repeats)),
+        'pad_cycles': latency_summary(time_calls(
+            lambda rows: pad_cycles(cycle_index.values, cycle_index.offsets, rows, max_len), positions, repeats)),
+        'build_batch': latency_summary(time_calls(lambda c: main.build_batch(bundle, [c]), cycles, repeats)),
+    }
+
+
+def bench_predict(bundle, repeats, sample_cycles):
+    """model.predict latency for one cycle and for the battery's full history."""
+    max_len = main.MAX_SEQ_LENGTHS[bundle.battery_id]
+    cycles = [int(c) for c in bundle.cycle_index.cycles]
+    singles = [(main.build_batch(bundle, [c]),) for c in cycles[:sample_cycles]]
+    full = [(bundle.cycle_index.batch(cycles, max_len),)]
+    predict = lambda x: bundle.model.predict(x, verbose=0)
+    return {
+        'predict_single': latency_summary(time_calls(predict, singles, repeats)),
+        'predict_full_history': dict(latency_summary(time_calls(predict, full, repeats)), cycles=len(cycles)),
+        'predict_cycles_single': latency_summary(time_calls(
+            lambda c: main.predict_cycles(bundle, [c]), [(c,) for c in cycles[:sample_cycles]], repeats)),
+    }
+
+
+def bench_loading(battery_id, engine, cold_runs, warm_runs):
+    """Cold (fresh process), warm (in-process reload) and resident (registry hit) loading."""
+    env = dict(os.environ, INFERENCE_ENGINE=engine, TF_CPP_MIN_LOG_LEVEL="3")
+    cold = []
+    for _ in range(cold_runs):
+        output = subprocess.run([sys.executable, "-c", COLD_LOAD_SNIPPET, battery_id], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        cold.append(json.loads(output.strip().splitlines()[-1]))
+
+    warm = time_calls(main.load_resources_sync, [(battery_id,)], warm_runs)
+    resident = time_calls(main.registry.get, [(battery_id,)], 100)
+    return {
+        'cold': {key: latency_summary([run[key] for run in cold]) for key in cold[0]} if cold else {},
+        'warm': latency_summary(warm),
+        'resident': latency_summary(resident),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batteries', nargs='+', default=['B0018'])
+    parser.add_argument('--engines', nargs='+', choices=['keras', 'numpy'],
+                        help="Engines to benchmark (default: every engine with a model file)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--sample-cycles', type=int, default=20, help="Cycles timed per per-cycle benchmark")
+    parser.add_argument('--cold-runs', type=int, default=2, help="Fresh processes per cold-load measurement")
+    parser.add_argument('--warm-runs', type=int, default=3)
+    parser.add_argument('--output', help="JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'metadata': run_metadata('suite', args), 'batteries': {}}
+    # Progress goes to stderr so the JSON on stdout stays parseable
+    with contextlib.redirect_stdout(sys.stderr):
+        for battery_id in args.batteries:
+            battery_results = {'engines': {}}
+            for engine in args.engines or available_engines(battery_id):
+                main.INFERENCE_ENGINE = engine
+                main.registry.remove(battery_id)
+                print(f"Benchmarking {battery_id} with the {engine} engine...")
+                engine_results = {'loading': bench_loading(battery_id, engine, args.cold_runs, args.warm_runs)}
+                bundle = main.registry.peek(battery_id)
+                engine_results.update(bench_predict(bundle, args.repeats, args.sample_cycles))
+                battery_results['engines'][engine] = engine_results
+                if 'preprocessing' not in battery_results:
+                    battery_results['preprocessing'] = bench_preprocessing(battery_id, bundle, args.repeats, args.sample_cycles)
+            results['batteries'][battery_id] = battery_results
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,125 @@
+"""
+Throughput-scaling curve of the multi-worker serving mode: starts
+`python main.py` with WEB_CONCURRENCY = 1..N, drives it with the load
+generator of bench_load.py (prediction cache disabled, so every request runs
+the model) and records requests/sec, latency and worker memory (RSS and PSS;
+PSS splits shared pages between the processes mapping them) as JSON.
+
+Usage (from app/backend, with MODEL_DIR and DATA_DIR set):
+    python benchmarks/bench_workers.py --workers 1 2 4 --output results/workers.json
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_common import BACKEND_DIR, latency_summary, run_metadata, write_results  # noqa: E402
+from bench_load import run_level, discover_cycles  # noqa: E402
+
+
+def child_pids(pid):
+    """Direct children of a process (the uvicorn workers), read from /proc."""
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for task in os.listdir(task_dir) if os.path.isdir(task_dir) else []:
+        with open(f"{task_dir}/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def memory_kb(pid):
+    """Returns {'rss_kb', 'pss_kb'} of a process from /proc/<pid>/smaps_rollup (Linux), or {} if unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return {}
+    return {'rss_kb': int(fields['Rss'].split()[0]), 'pss_kb': int(fields['Pss'].split()[0])}
+
+
+async def wait_until_ready(url, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server at {url} did not start within {timeout_s}s")
+
+
+async def measure(args, url):
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout) as client:
+        cycles = await discover_cycles(client, args.battery)
+        # Every worker loads the battery on its first request; warm them all before timing
+        await run_level(client, args, cycles, args.concurrency, args.warmup, seed=-1)
+        latencies, statuses, wall_time = await run_level(client, args, cycles, args.concurrency, args.requests, seed=1)
+    return {
+        'requests': len(latencies),
+        'wall_time_s': round(wall_time, 4),
+        'requests_per_s': round(len(latencies) / wall_time, 2),
+        'latency': latency_summary(latencies),
+        'status_counts': statuses,
+    }
+
+
+def run_workers(args, workers):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(args.port), PREDICTION_CACHE_SIZE="0",
+               TF_CPP_MIN_LOG_LEVEL="3", LOG_LEVEL="WARNING")
+    server = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_ready(url, args.startup_timeout))
+        result = asyncio.run(measure(args, url))
+        processes = child_pids(server.pid) if workers > 1 else [server.pid]
+        memory = [memory_kb(pid) for pid in processes]
+        result.update({
+            'workers': workers,
+            'worker_memory_kb': memory,
+            'total_rss_kb': sum(m.get('rss_kb', 0) for m in memory),
+            'total_pss_kb': sum(m.get('pss_kb', 0) for m in memory),
+        })
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--battery', default='B0018')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight")
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--scenario', choices=['single', 'batch'], default='single')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--startup-timeout', type=float, default=120.0)
+    parser.add_argument('--output', help="JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    results = {'metadata': run_metadata('workers', args), 'levels': []}
+    baseline = None
+    for workers in args.workers:
+        level = run_workers(args, workers)
+        baseline = baseline or level['requests_per_s']
+        level['speedup'] = round(level['requests_per_s'] / baseline, 2)
+        results['levels'].append(level)
+        print(f"workers {workers:>3}: {level['requests_per_s']:>9} req/s ({level['speedup']}x), "
+              f"p50 {level['latency']['p50_ms']:8.2f} ms, p99 {level['latency']['p99_ms']:8.2f} ms, "
+              f"RSS {level['total_rss_kb'] / 1024:7.1f} MB, PSS {level['total_pss_kb'] / 1024:7.1f} MB", file=sys.stderr)
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
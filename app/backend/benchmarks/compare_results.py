@@ -0,0 +1,53 @@
+"""
+Compares two JSON result files of bench_suite.py or bench_load.py metric by
+metric, e.g. before and after a configuration change.
+
+Usage (from app/backend):
+    python benchmarks/compare_results.py results/before.json results/after.json --filter p50
+"""
+import argparse
+import json
+
+
+def flatten(value, prefix=''):
+    """Yields (dotted path, number) for every numeric leaf. Load-test levels are keyed by concurrency."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            key = f"c{child['concurrency']}" if isinstance(child, dict) and 'concurrency' in child else str(i)
+            yield from flatten(child, f"{prefix}.{key}")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--filter', default='', help="Only show metrics whose path contains this text")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    for name, results in (('baseline', baseline), ('candidate', candidate)):
+        metadata = results.get('metadata', {})
+        print(f"{name:<10} {metadata.get('benchmark')} @ {metadata.get('git_revision')} "
+              f"{metadata.get('timestamp')} config {metadata.get('config')}")
+
+    before = dict(flatten({k: v for k, v in baseline.items() if k != 'metadata'}))
+    after = dict(flatten({k: v for k, v in candidate.items() if k != 'metadata'}))
+    print(f"\n{'metric':<70}{'baseline':>14}{'candidate':>14}{'ratio':>9}")
+    for path in sorted(set(before) | set(after)):
+        if args.filter not in path:
+            continue
+        old, new = before.get(path), after.get(path)
+        ratio = f"{new / old:8.2f}x" if old and new is not None else ''
+        print(f"{path:<70}{'-' if old is None else f'{old:.4g}':>14}{'-' if new is None else f'{new:.4g}':>14}{ratio:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import os
+import shutil
+
+import numpy as np
+
+
+class CycleIndex:
+    """
+    Per-cycle view of a battery's sequence data, built once at load time.
+
+    All rows are stored in one contiguous float32 `values` buffer ordered by cycle,
+    with `offsets` marking where each cycle starts, so fetching a cycle is a slice
+    instead of a boolean mask over the whole DataFrame.
+
+    Args:
+        cycles (np.ndarray): Sorted cycle numbers, shape (n_cycles,).
+        offsets (np.ndarray): Row offsets into `values`, shape (n_cycles + 1,).
+        values (np.ndarray): Sequence rows, shape (n_rows, n_features).
+        padded (np.ndarray, optional): Pre-padded batch of every cycle,
+                                       shape (n_cycles, max_len, n_features).
+    """
+
+    def __init__(self, cycles, offsets, values, padded=None):
+        self.cycles = cycles
+        self.offsets = offsets
+        self.values = values
+        self.padded = padded
+        self.positions = {int(cycle): i for i, cycle in enumerate(cycles)}
+
+    @classmethod
+    def from_columns(cls, columns, features, scaler=None, max_len=None, cycles=None, offsets=None):
+        """
+        Groups a battery's per-measurement columns by `cycle_number` into an index.
+
+        Args:
+            columns (Mapping): Column name -> array (a DataFrame or a dict of
+                               arrays) including `cycle_number`.
+            features (list): Columns that make up the model input sequence.
+            scaler (optional): Fitted scaler applied once to all rows, so the
+                               stored values are already model-ready.
+            max_len (int, optional): When given, also builds the pre-padded
+                                     (n_cycles, max_len, n_features) tensor.
+            cycles, offsets (np.ndarray, optional): A precomputed cycle-offset
+                                     index for rows already sorted by cycle.
+
+        Returns:
+            CycleIndex: The built index.
+        """
+        values = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in features])
+        if cycles is None or offsets is None:
+            # Stable sort keeps the measurement order within each cycle
+            cycle_numbers = np.asarray(columns['cycle_number'])
+            order = np.argsort(cycle_numbers, kind='stable')
+            cycles, starts = np.unique(cycle_numbers[order], return_index=True)
+            offsets = np.append(starts, len(order))
+            values = values[order]
+        if scaler is not None:
+            values = scaler.transform(values)
+        values = np.ascontiguousarray(values, dtype=np.float32)
+        cycles = np.asarray(cycles)
+        offsets = np.asarray(offsets, dtype=np.int64)
+
+        padded = None
+        if max_len is not None:
+            padded = pad_cycles(values, offsets, range(len(cycles)), max_len)
+        return cls(cycles, offsets, values, padded)
+
+    def save(self, directory):
+        """
+        Writes the index as .npy files into `directory`, atomically: readers
+        see either the complete index or no directory.
+
+        Returns:
+            bool: False if another writer published `directory` first.
+        """
+        tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        arrays = {'cycles': self.cycles, 'offsets': self.offsets, 'values': self.values}
+        if self.padded is not None:
+            arrays['padded'] = self.padded
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+        try:
+            os.rename(tmp_dir, directory)
+            return True
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Memory-maps an index written by `save`. The arrays are read-only and
+        backed by the page cache, so processes mapping the same directory
+        share one copy.
+        """
+        def load_array(name):
+            return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+        padded_path = os.path.join(directory, 'padded.npy')
+        padded = load_array('padded') if os.path.exists(padded_path) else None
+        return cls(np.asarray(load_array('cycles')), np.asarray(load_array('offsets')), load_array('values'), padded)
+
+    def __contains__(self, cycle_number):
+        return cycle_number in self.positions
+
+    def __len__(self):
+        return len(self.cycles)
+
+    def get(self, cycle_number):
+        """Returns the (n_steps, n_features) view of a cycle, or None if it is not indexed."""
+        i = self.positions.get(cycle_number)
+        if i is None:
+            return None
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def lengths(self):
+        """Returns the number of measurements of every cycle."""
+        return np.diff(self.offsets)
+
+    def lengths_of(self, cycle_numbers, max_len):
+        """Returns the padded-batch length (true length capped at `max_len`) of the given indexed cycles."""
+        lengths = self.lengths()
+        return np.minimum([lengths[self.positions[c]] for c in cycle_numbers], max_len)
+
+    def batch(self, cycle_numbers, max_len):
+        """
+        Returns a padded (n, max_len, n_features) batch for the given indexed cycles.
+
+        Uses the pre-padded tensor when it was built for the same `max_len`.
+        """
+        rows = [self.positions[c] for c in cycle_numbers]
+        if self.padded is not None and self.padded.shape[1] == max_len:
+            return self.padded[rows]
+        return pad_cycles(self.values, self.offsets, rows, max_len)
+
+
+def pad_cycles(values, offsets, rows, max_len):
+    """
+    Pads the selected cycles into one float32 batch.
+
+    Matches `pad_sequences(..., maxlen=max_len, padding='post', value=0.0)`:
+    cycles longer than `max_len` keep their last `max_len` steps.
+    """
+    rows = list(rows)
+    batch = np.zeros((len(rows), max_len, values.shape[1]), dtype=np.float32)
+    for out, i in enumerate(rows):
+        sequence = values[offsets[i]:offsets[i + 1]][-max_len:]
+        batch[out, :len(sequence)] = sequence
+    return batch
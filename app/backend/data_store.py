@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+
+
+def csv_path(data_dir: str, battery_id: str) -> str:
+    return os.path.join(data_dir, f'optimized_nasa_battery_data_{battery_id}_preprocessed.csv')
+
+
+def columnar_dir(data_dir: str, battery_id: str) -> str:
+    """Directory of the .npy layout written by scripts/optimize_csv.py."""
+    return os.path.join(data_dir, f'optimized_nasa_battery_data_{battery_id}_preprocessed_columns')
+
+
+def columnar_meta_path(data_dir: str, battery_id: str):
+    """
+    The columnar layout's meta.json, or None when there is no layout or it is
+    older than the CSV (the CSV was rewritten without regenerating the layout,
+    e.g. by `optimize_csv.py --no-columnar`), so stale data is never served.
+    """
+    meta_path = os.path.join(columnar_dir(data_dir, battery_id), 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    path = csv_path(data_dir, battery_id)
+    if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(meta_path):
+        return None
+    return meta_path
+
+
+def data_source_path(data_dir: str, battery_id: str) -> str:
+    """The file a battery's data is loaded from: the columnar layout's meta.json, else the CSV."""
+    return columnar_meta_path(data_dir, battery_id) or csv_path(data_dir, battery_id)
+
+
+def data_exists(data_dir: str, battery_id: str) -> bool:
+    return os.path.exists(os.path.join(columnar_dir(data_dir, battery_id), 'meta.json')) or \
+        os.path.exists(csv_path(data_dir, battery_id))
+
+
+def load_battery_columns(data_dir: str, battery_id: str, columns=None):
+    """
+    Loads a battery's optimized data as a dict of column arrays.
+
+    The columnar layout is memory-mapped read-only, so nothing is parsed and
+    processes reading the same battery share its pages. Falls back to parsing
+    the CSV when the layout has not been generated or is older than the CSV.
+
+    Args:
+        data_dir (str): Directory with the optimized data files.
+        battery_id (str): Battery identifier, e.g. 'B0018'.
+        columns (list, optional): Columns to load. Loads every column when None.
+
+    Returns:
+        tuple: (dict of column name -> np.ndarray, dict with 'index_cycles' and
+               'index_offsets' or None for CSV input, source path)
+    """
+    layout_dir = columnar_dir(data_dir, battery_id)
+    meta_path = columnar_meta_path(data_dir, battery_id)
+    if meta_path is not None:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        names = meta['columns'] if columns is None else columns
+        data = {name: np.load(os.path.join(layout_dir, f'{name}.npy'), mmap_mode='r') for name in names}
+        index = {
+            'index_cycles': np.load(os.path.join(layout_dir, 'index_cycles.npy')),
+            'index_offsets': np.load(os.path.join(layout_dir, 'index_offsets.npy')),
+        }
+        return data, index, layout_dir
+
+    path = csv_path(data_dir, battery_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found: {path}")
+    import pandas as pd # Only the CSV fallback needs pandas; deferred to keep the API's startup fast
+    df = pd.read_csv(path, usecols=columns)
+    return {name: df[name].to_numpy() for name in df.columns}, None, path
+
+
+def cycle_soh(columns):
+    """
+    Reduces per-measurement columns to one SoH value per cycle (SoH is
+    constant within a cycle, so the first row of each cycle is used).
+
+    Args:
+        columns (Mapping): Column name -> array including `cycle_number` and `soh`.
+
+    Returns:
+        tuple: (sorted cycle numbers, float64 SoH per cycle)
+    """
+    cycles, first_rows = np.unique(np.asarray(columns['cycle_number']), return_index=True)
+    return cycles, np.asarray(columns['soh'], dtype=np.float64)[first_rows]
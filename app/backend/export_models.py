@@ -0,0 +1,36 @@
+"""
+Exports every lstm_final_<id>_soh.keras model in MODEL_DIR to the .npz weight
+format run by the NumPy inference engine (INFERENCE_ENGINE=numpy).
+
+Usage (from app/backend):
+    MODEL_DIR=../models python export_models.py
+"""
+import glob
+import os
+import re
+
+from lean_lstm import export_keras_model
+
+MODEL_DIR = os.environ.get("MODEL_DIR", '/app/models/')
+
+
+def main():
+    from tensorflow import keras
+
+    model_paths = sorted(glob.glob(os.path.join(MODEL_DIR, 'lstm_final_*_soh.keras')))
+    if not model_paths:
+        print(f"No lstm_final_*_soh.keras models found in {MODEL_DIR}")
+        return
+    for model_path in model_paths:
+        battery_id = re.match(r'lstm_final_(.+)_soh\.keras$', os.path.basename(model_path)).group(1)
+        output_path = os.path.join(MODEL_DIR, f'lstm_final_{battery_id}_soh.npz')
+        try:
+            export_keras_model(keras.models.load_model(model_path), output_path)
+        except ValueError as e:
+            print(f"Skipping {model_path}: {e}")
+            continue
+        print(f"Exported {model_path} -> {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
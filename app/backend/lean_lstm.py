@@ -0,0 +1,153 @@
+import numpy as np
+
+# Layer stack supported by the NumPy runtime (the lstm_final_*_soh models)
+SUPPORTED_LAYERS = ['Masking', 'LSTM', 'Dropout', 'Dense']
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTMModel:
+    """
+    Pure-NumPy forward pass of a Masking -> LSTM -> Dropout -> Dense model.
+
+    Loads the weights written by `export_keras_model` and mirrors the small
+    part of the Keras API the backend uses (`predict`, `get_weights`), so it can
+    stand in for the Keras model without importing TensorFlow.
+
+    Timesteps whose features all equal `mask_value` are skipped, as Keras'
+    Masking layer does: the LSTM state is carried over unchanged.
+    """
+
+    def __init__(self, weights):
+        self.mask_value = float(weights['mask_value'])
+        self.kernel = weights['lstm_kernel'].astype(np.float32)
+        self.recurrent_kernel = weights['lstm_recurrent_kernel'].astype(np.float32)
+        self.bias = weights['lstm_bias'].astype(np.float32)
+        self.dense_kernel = weights['dense_kernel'].astype(np.float32)
+        self.dense_bias = weights['dense_bias'].astype(np.float32)
+        self.units = self.recurrent_kernel.shape[0]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls({name: weights[name] for name in weights.files})
+
+    @classmethod
+    def from_keras(cls, model):
+        """Builds the NumPy runtime from an in-memory Keras model (see `export_keras_model`)."""
+        return cls(keras_lstm_weights(model))
+
+    def get_weights(self):
+        return [self.kernel, self.recurrent_kernel, self.bias, self.dense_kernel, self.dense_bias]
+
+    def predict(self, x, verbose=0, lengths=None, batch_size=None):
+        """
+        Returns the (n, 1) predictions for an (n, timesteps, n_features) batch.
+
+        Args:
+            x (np.ndarray): Post-padded input batch.
+            lengths (array-like, optional): True (unpadded) length of each
+                sequence. When given, each sequence only runs for its own
+                length and no work is spent on its trailing padding.
+            batch_size: Ignored (Keras signature): the whole batch is always one pass.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        n, timesteps, _ = x.shape
+        lengths = np.full(n, timesteps) if lengths is None else np.minimum(np.asarray(lengths), timesteps)
+
+        # Longest first, so the rows still running at any timestep are a prefix of the batch
+        order = np.argsort(-lengths, kind='stable')
+        x = x[order]
+        lengths = lengths[order]
+        mask = np.any(x != self.mask_value, axis=2)
+
+        h = np.zeros((n, self.units), dtype=np.float32)
+        c = np.zeros((n, self.units), dtype=np.float32)
+        for t in range(int(lengths.max()) if n else 0):
+            k = int(np.count_nonzero(lengths > t))
+            h_new, c_new = self._cell(x[:k, t], h[:k], c[:k])
+            step = mask[:k, t:t + 1]
+            c[:k] = np.where(step, c_new, c[:k])
+            h[:k] = np.where(step, h_new, h[:k])
+
+        predictions = np.empty((n, self.dense_kernel.shape[1]), dtype=np.float32)
+        predictions[order] = self.output(h)
+        return predictions
+
+    def initial_state(self):
+        """Returns the zero (h, c) state of a single sequence."""
+        return np.zeros(self.units, dtype=np.float32), np.zeros(self.units, dtype=np.float32)
+
+    def advance(self, state, x):
+        """
+        Runs one sequence forward from `state` over more timesteps.
+
+        Args:
+            state (tuple): (h, c) returned by `initial_state` or a previous call.
+            x (np.ndarray): The next (timesteps, n_features) rows of the sequence.
+
+        Returns:
+            tuple: The (h, c) state after the last row. `state` is not modified.
+        """
+        h, c = state
+        for row in np.asarray(x, dtype=np.float32):
+            if np.all(row == self.mask_value):
+                continue # Masked timestep: state carried over
+            h, c = self._cell(row, h, c)
+        return h, c
+
+    def output(self, h):
+        """Maps LSTM hidden state(s) to predictions (Dropout is a no-op at inference)."""
+        return h @ self.dense_kernel + self.dense_bias
+
+    def _cell(self, x_t, h, c):
+        u = self.units
+        z = x_t @ self.kernel + self.bias + h @ self.recurrent_kernel
+        i = _sigmoid(z[..., :u])
+        f = _sigmoid(z[..., u:2 * u])
+        g = np.tanh(z[..., 2 * u:3 * u])
+        o = _sigmoid(z[..., 3 * u:])
+        c_new = f * c + i * g
+        return o * np.tanh(c_new), c_new
+
+
+def keras_lstm_weights(model):
+    """
+    Extracts the weights of a Keras Masking -> LSTM -> Dropout -> Dense model
+    in the layout used by `NumpyLSTMModel`.
+
+    Raises:
+        ValueError: If the model's architecture is not supported.
+    """
+    layer_types = [layer.__class__.__name__ for layer in model.layers]
+    if layer_types != SUPPORTED_LAYERS:
+        raise ValueError(f"Unsupported layer stack {layer_types}, expected {SUPPORTED_LAYERS}")
+    masking, lstm, _, dense = model.layers
+
+    lstm_config = lstm.get_config()
+    expected = {'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'use_bias': True,
+                'return_sequences': False, 'go_backwards': False}
+    for key, value in expected.items():
+        if lstm_config.get(key) != value:
+            raise ValueError(f"Unsupported LSTM setting {key}={lstm_config.get(key)!r}, expected {value!r}")
+    if dense.get_config().get('activation') != 'linear':
+        raise ValueError("Only a linear output Dense layer is supported")
+
+    kernel, recurrent_kernel, bias = lstm.get_weights()
+    dense_kernel, dense_bias = dense.get_weights()
+    return {'mask_value': np.float32(masking.get_config()['mask_value']),
+            'lstm_kernel': kernel, 'lstm_recurrent_kernel': recurrent_kernel, 'lstm_bias': bias,
+            'dense_kernel': dense_kernel, 'dense_bias': dense_bias}
+
+
+def export_keras_model(model, path):
+    """
+    Writes the weights of a Keras Masking -> LSTM -> Dropout -> Dense model
+    to an .npz file loadable by `NumpyLSTMModel.load`.
+
+    Raises:
+        ValueError: If the model's architecture is not supported.
+    """
+    np.savez(path, **keras_lstm_weights(model))
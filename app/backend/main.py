@@ -1,17 +1,33 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import JSONResponse
 import numpy as np
-import pandas as pd
 import pickle
 import os
-from tensorflow import keras
-from keras.preprocessing.sequence import pad_sequences
+import time
+import hashlib
+import shutil
+import tempfile
+import logging
 from pydantic import BaseModel
-import uvicorn 
 import asyncio 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+from batching import MicroBatcher
+from cycle_index import CycleIndex
+from data_store import load_battery_columns, data_exists, data_source_path, cycle_soh
+from registry import BatteryBundle, ModelRegistry
+from result_cache import ResultCache
+from lean_lstm import NumpyLSTMModel
+from tree_engine import TreeSoHEngine, FEATURE_SOURCE_COLUMNS
+from streaming import CycleStream, StreamSession
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from profiler import SamplingProfiler
+from warmup import WarmupTracker
 
 # --- Configuration ---
-MODEL_DIR = '/app/models/'
-DATA_DIR = '/app/data/processed_data/'
+MODEL_DIR = os.environ.get("MODEL_DIR", '/app/models/')
+DATA_DIR = os.environ.get("DATA_DIR", '/app/data/processed_data/')
 MAX_SEQ_LENGTHS = {
     'B0005': 371,
     'B0006': 381,
@@ -23,85 +39,596 @@ SEQUENCE_FEATURES = [
     'temperature_measured_smooth',
     'measurement_time_relative'
 ]
+# Dynamic micro-batching of concurrent single-cycle requests
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "5"))
+# Blocking work (model inference, resource loading) runs on bounded thread pools, off the event loop
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+LOADING_WORKERS = int(os.environ.get("LOADING_WORKERS", "1"))
+# Keep a pre-scaled, pre-padded tensor of every cycle per battery (trades memory for per-request work)
+PREPAD_SEQUENCES = os.environ.get("PREPAD_SEQUENCES", "1") == "1"
+# Resident battery budget (0 = unlimited); least recently used batteries are evicted first
+REGISTRY_MAX_BATTERIES = int(os.environ.get("REGISTRY_MAX_BATTERIES", "0"))
+REGISTRY_MAX_MEMORY_MB = float(os.environ.get("REGISTRY_MAX_MEMORY_MB", "0"))
+# Comma-separated batteries to load (and warm up) in the background at startup, e.g. "B0005,B0018"
+PRELOAD_BATTERIES = [b.strip() for b in os.environ.get("PRELOAD_BATTERIES", "").split(",") if b.strip()]
+# Startup warm-up: import TensorFlow (Keras engine) and run dummy padded batches through each preloaded model,
+# so first requests do not pay for the import or graph tracing. /health/ready returns 503 until it finished
+WARMUP_MODELS = os.environ.get("WARMUP_MODELS", "1") == "1"
+# Inference engine: "keras" (TensorFlow) or "numpy" (weights exported by export_models.py, no TensorFlow import)
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "keras").lower()
+if INFERENCE_ENGINE not in ("keras", "numpy"):
+    raise ValueError(f"Unknown INFERENCE_ENGINE {INFERENCE_ENGINE!r}, expected 'keras' or 'numpy'")
+# Prediction engine of requests that do not choose one: "lstm" (per-timestep sequence model) or "fast"
+# (cycle-level tree model on health-indicator features; batteries without one fall back to "lstm")
+DEFAULT_PREDICTION_ENGINE = os.environ.get("DEFAULT_PREDICTION_ENGINE", "lstm").lower()
+if DEFAULT_PREDICTION_ENGINE not in ("lstm", "fast"):
+    raise ValueError(f"Unknown DEFAULT_PREDICTION_ENGINE {DEFAULT_PREDICTION_ENGINE!r}, expected 'lstm' or 'fast'")
+# Tree model of the "fast" engine: "random_forest" or "xgboost" (needs the xgboost package)
+TREE_MODEL = os.environ.get("TREE_MODEL", "random_forest").lower()
+# Skip padding work: the NumPy engine runs each sequence to its true length, the Keras engine
+# trims each batch to its longest sequence rounded up to LENGTH_BUCKET_SIZE steps (bounds retracing)
+LENGTH_AWARE_INFERENCE = os.environ.get("LENGTH_AWARE_INFERENCE", "1") == "1"
+LENGTH_BUCKET_SIZE = int(os.environ.get("LENGTH_BUCKET_SIZE", "32"))
+# Cache of prediction results keyed by battery, cycle and resource file fingerprint
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "3600"))
+# How often a loaded battery's model/scaler/data files are checked for changes
+RESOURCE_CHECK_INTERVAL_S = float(os.environ.get("RESOURCE_CHECK_INTERVAL_S", "2"))
+# Live cycle streaming sessions: idle sessions are dropped after STREAM_SESSION_TTL_S
+STREAM_SESSION_TTL_S = float(os.environ.get("STREAM_SESSION_TTL_S", "900"))
+STREAM_MAX_SESSIONS = int(os.environ.get("STREAM_MAX_SESSIONS", "1000"))
+# Production serving: worker processes started by `python main.py` (uvicorn's --workers also reads it)
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Sessions live in one worker's memory, so with several workers streaming is refused unless a proxy keeps
+# each client on one worker (sticky connections); set to 1 in that case
+STREAM_STICKY_SESSIONS = os.environ.get("STREAM_STICKY_SESSIONS", "0") == "1"
+PORT = int(os.environ.get("PORT", "5000"))
+# TensorFlow thread pools per worker (0 = TensorFlow's default of one thread per core)
+TF_INTRA_OP_THREADS = int(os.environ.get("TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.environ.get("TF_INTER_OP_THREADS", "0"))
+# Directory (ideally tmpfs such as /dev/shm) where the scaled cycle index of each battery is published once and
+# memory-mapped by every worker, instead of each worker parsing the data and holding its own copy ("" = off)
+SHARED_INDEX_DIR = os.environ.get("SHARED_INDEX_DIR", "")
+# Logging: per-request lines are DEBUG, loading and errors INFO and above
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Default sampling interval of the runtime-toggled profiler (/admin/profiler)
+PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "10"))
 
-models_cache = {}
-scalers_cache = {}
-data_cache = {}
+# Only the API's own logger is configured; uvicorn and libraries keep their logging setup
+logger = logging.getLogger("battery_api")
+logger.setLevel(LOG_LEVEL)
+if not logger.handlers:
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(log_handler)
+    logger.propagate = False
+
+registry = ModelRegistry(max_entries=REGISTRY_MAX_BATTERIES, max_bytes=int(REGISTRY_MAX_MEMORY_MB * 1024 * 1024))
+result_cache = ResultCache(max_entries=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_S)
 loading_tasks = {} 
+summary_tasks = {}
+batchers = {}
+stream_sessions = {}
+profiler = SamplingProfiler(interval_s=PROFILER_INTERVAL_MS / 1000)
+warmup = WarmupTracker()
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+loading_executor = ThreadPoolExecutor(max_workers=LOADING_WORKERS, thread_name_prefix="loading")
+
+# --- Metrics (Prometheus text format on GET /metrics) ---
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram("battery_api_request_duration_seconds", "HTTP request latency by route",
+                                    ["method", "route", "status"])
+stage_seconds = metrics.histogram("battery_api_stage_duration_seconds", "Time spent in each prediction stage",
+                                  ["endpoint", "stage"])
+load_seconds = metrics.histogram("battery_api_resource_load_duration_seconds",
+                                 "Resource loading time per battery and step (step=total for the whole load)",
+                                 ["battery_id", "step"])
+loads_total = metrics.counter("battery_api_resource_loads_total", "Resource loads by battery and result",
+                              ["battery_id", "result"])
+predictions_total = metrics.counter("battery_api_predictions_total", "Predicted cycles by endpoint and source",
+                                    ["endpoint", "source"])
+
+def metric_battery_label(battery_id: str) -> str:
+    """Battery label of metrics; unknown IDs share one label so arbitrary requests cannot add series."""
+    return battery_id if battery_id in MAX_SEQ_LENGTHS else "unknown"
+
+metrics.callback("battery_api_registry_batteries", "Resident batteries in the model registry",
+                 lambda: [({}, len(registry))])
+metrics.callback("battery_api_registry_resident_bytes", "Estimated footprint of resident batteries",
+                 lambda: [({}, registry.total_bytes())])
+metrics.callback("battery_api_prediction_cache_entries", "Entries in the prediction result cache",
+                 lambda: [({}, len(result_cache))])
+metrics.callback("battery_api_prediction_cache_lookups_total", "Prediction cache lookups by result",
+                 lambda: [({'result': 'hit'}, result_cache.hits), ({'result': 'miss'}, result_cache.misses)],
+                 metric_type="counter")
+metrics.callback("battery_api_micro_batch_queue_depth", "Requests waiting in each battery's micro-batcher",
+                 lambda: [({'battery_id': b}, batcher.stats()['queue_depth']) for b, batcher in list(batchers.items())])
+metrics.callback("battery_api_stream_sessions", "Open streaming sessions",
+                 lambda: [({}, len(stream_sessions))])
+metrics.callback("battery_api_ready", "1 once the startup warm-up finished", lambda: [({}, int(warmup.done))])
+metrics.callback("battery_api_time_to_first_prediction_seconds", "Time from startup to each battery's first prediction",
+                 lambda: [({'battery_id': metric_battery_label(b)}, first['since_startup_s'])
+                          for b, first in list(warmup.first_predictions.items())])
+metrics.callback("battery_api_first_prediction_duration_seconds", "Latency of each battery's first prediction request",
+                 lambda: [({'battery_id': metric_battery_label(b)}, first['request_s'])
+                          for b, first in list(warmup.first_predictions.items())])
 
 class PredictionRequest(BaseModel):
     cycle_number: int
+    engine: Optional[Literal["lstm", "fast"]] = None # Default: DEFAULT_PREDICTION_ENGINE
 
 class PredictionResponse(BaseModel):
     battery_id: str
     cycle_number: int
     predicted_soh: float
+    engine: str
+
+class BatchPredictionRequest(BaseModel):
+    cycle_numbers: Optional[List[int]] = None # Explicit list of cycles
+    start_cycle: Optional[int] = None # Inclusive range start (used when cycle_numbers is not given)
+    end_cycle: Optional[int] = None # Inclusive range end
+    engine: Optional[Literal["lstm", "fast"]] = None # Default: DEFAULT_PREDICTION_ENGINE
+
+class CyclePrediction(BaseModel):
+    cycle_number: int
+    predicted_soh: float
+
+class BatchPredictionResponse(BaseModel):
+    battery_id: str
+    predictions: List[CyclePrediction]
+    missing_cycles: List[int]
+    engine: str
+
+class CycleSummaryResponse(BaseModel):
+    battery_id: str
+    cycle_numbers: List[int] # Every cycle with data
+    # Trend as parallel lists; at most `max_points` evenly spaced cycles (first and last always included)
+    trend_cycles: List[int]
+    actual_soh: List[Optional[float]]
+    predicted_soh: List[float]
+    engine: str
+
+class SampleChunk(BaseModel):
+    # Raw measurements of an in-progress discharge cycle, in arrival order
+    measurement_time_relative: List[float] # Seconds since the start of the cycle
+    voltage_measured: List[float]
+    current_measured: List[float]
+    temperature_measured: List[float]
+    end_of_cycle: bool = False # Close the session after this chunk
+
+class StreamResponse(BaseModel):
+    session_id: str
+    battery_id: str
+    samples_received: int
+    samples_final: int # Samples whose smoothing is final and already folded into the LSTM state
+    predicted_soh: Optional[float]
+    closed: bool
+
+async def run_inference(func, *args):
+    """Runs a blocking preprocessing/inference call on the inference thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, func, *args)
+
+def resource_paths(battery_id: str):
+    """Returns the model (for the configured engine) and scaler file paths of a battery."""
+    model_extension = 'npz' if INFERENCE_ENGINE == 'numpy' else 'keras'
+    return (os.path.join(MODEL_DIR, f'lstm_final_{battery_id}_soh.{model_extension}'),
+            os.path.join(MODEL_DIR, f'scaler_lstm_{battery_id}_soh.pkl'))
+
+def tree_resource_paths(battery_id: str):
+    """Returns the tree model, imputer and scaler file paths of a battery's "fast" engine."""
+    return (os.path.join(MODEL_DIR, f'{TREE_MODEL}_{battery_id}_soh_cycle_v1.pkl'),
+            os.path.join(MODEL_DIR, f'imputer_{battery_id}_soh_cycle.pkl'),
+            os.path.join(MODEL_DIR, f'scaler_{battery_id}_soh_cycle.pkl'))
+
+def load_tree_engine(battery_id: str, columns=None):
+    """
+    Scores every cycle of a battery with its cycle-level tree model. Returns None when the battery
+    has no tree model or it fails to load (only the "fast" engine is then unavailable).
+    """
+    paths = tree_resource_paths(battery_id)
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    try:
+        with load_seconds.time(battery_id=metric_battery_label(battery_id), step="tree_model"):
+            if columns is None:
+                columns, _, _ = load_battery_columns(DATA_DIR, battery_id, columns=FEATURE_SOURCE_COLUMNS)
+            return TreeSoHEngine.from_files(*paths, columns)
+    except Exception as e:
+        logger.error("Error loading the %s model for %s, fast engine unavailable: %s", TREE_MODEL, battery_id, e)
+        return None
+
+def load_model(model_path: str):
+    """Loads a model for the configured inference engine."""
+    if INFERENCE_ENGINE == 'numpy':
+        return NumpyLSTMModel.load(model_path)
+    import tensorflow as tf # Only the Keras engine pays for importing TensorFlow
+    configure_tensorflow_threads(tf)
+    return tf.keras.models.load_model(model_path)
+
+def configure_tensorflow_threads(tf):
+    """Pins TensorFlow's thread pools to TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS (before its first op)."""
+    try:
+        if TF_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+        if TF_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+    except RuntimeError:
+        pass # Already initialized (e.g. a second model in this process): the first setting holds
+
+def shared_index_path(battery_id: str, fingerprint: str) -> str:
+    """Directory of a battery's shared cycle index for one version of its files and padding setting."""
+    max_len = MAX_SEQ_LENGTHS.get(battery_id) if PREPAD_SEQUENCES else 0
+    return os.path.join(SHARED_INDEX_DIR, f"{battery_id}-{fingerprint}-{max_len}")
+
+def publish_shared_index(cycle_index: CycleIndex, battery_id: str, path: str) -> CycleIndex:
+    """Writes a freshly built index to the shared directory and returns the memory-mapped copy."""
+    os.makedirs(SHARED_INDEX_DIR, exist_ok=True)
+    if cycle_index.save(path):
+        # Older versions of this battery's index are no longer needed (mapped copies stay valid until unmapped)
+        for name in os.listdir(SHARED_INDEX_DIR):
+            old_path = os.path.join(SHARED_INDEX_DIR, name)
+            if name.startswith(f"{battery_id}-") and old_path != path and ".tmp-" not in name:
+                shutil.rmtree(old_path, ignore_errors=True)
+    return CycleIndex.load(path)
+
+def resource_fingerprint(battery_id: str) -> str:
+    """Identifies the version (mtime and size) of the model, scaler, tree model and data files of a battery."""
+    parts = []
+    for path in (*resource_paths(battery_id), *tree_resource_paths(battery_id), data_source_path(DATA_DIR, battery_id)):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append("missing")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+def is_stale(bundle: BatteryBundle) -> bool:
+    """True when a loaded battery's files changed since it was loaded (checked at most every RESOURCE_CHECK_INTERVAL_S)."""
+    now = time.monotonic()
+    if now - bundle.checked_at < RESOURCE_CHECK_INTERVAL_S:
+        return False
+    bundle.checked_at = now
+    return resource_fingerprint(bundle.battery_id) != bundle.fingerprint
 
 async def load_resources_async(battery_id: str):
-    """Asynchronously loads resources if not already loaded."""
-    if battery_id in models_cache:
-        return True # Already loaded
+    """Asynchronously loads resources if not already loaded. Returns the battery's bundle, or None on failure."""
+    bundle = registry.get(battery_id)
+    if bundle is not None:
+        if not is_stale(bundle):
+            return bundle # Already loaded
+        logger.info("Resource files for %s changed, reloading...", battery_id)
 
     # Check if already loading
-    if battery_id in loading_tasks and not loading_tasks[battery_id].done():
-        print(f"Waiting for resources for {battery_id} to finish loading...")
-        await loading_tasks[battery_id]
-        return battery_id in models_cache # Check again if loading succeeded
+    task = loading_tasks.get(battery_id)
+    if task is not None:
+        logger.debug("Waiting for resources for %s to finish loading...", battery_id)
+    else:
+        # Start loading on the loading thread pool so the event loop stays responsive
+        logger.info("Initiating resource loading for %s...", battery_id)
+        task = asyncio.get_running_loop().run_in_executor(loading_executor, load_resources_sync, battery_id)
+        loading_tasks[battery_id] = task
 
-    # Start loading task
-    print(f"Initiating resource loading for {battery_id}...")
-    task = asyncio.create_task(load_resources_sync(battery_id))
-    loading_tasks[battery_id] = task
-    await task
+    try:
+        # Shield so a cancelled request does not abandon a load other requests are waiting on
+        bundle = await asyncio.shield(task)
+    except Exception:
+        bundle = None # Failure is reported below; details were logged by load_resources_sync
+    finally:
+        if loading_tasks.get(battery_id) is task:
+            del loading_tasks[battery_id] # Remove finished task tracker
 
     # Check if loading succeeded after task completion
-    if battery_id in models_cache:
-        print(f"Resources successfully loaded for {battery_id}.")
-        del loading_tasks[battery_id] # Remove completed task tracker
-        return True
+    if bundle is not None:
+        logger.info("Resources successfully loaded for %s.", battery_id)
+        result_cache.invalidate(battery_id, keep_fingerprint=bundle.fingerprint)
     else:
-        print(f"Resource loading failed for {battery_id}.")
-        del loading_tasks[battery_id] # Remove failed task tracker
-        return False
+        logger.warning("Resource loading failed for %s.", battery_id)
+    return bundle
 
 def load_resources_sync(battery_id: str):
-    """Synchronous part of resource loading (runs in background task)."""
-    model_path = os.path.join(MODEL_DIR, f'lstm_final_{battery_id}_soh.keras')
-    scaler_path = os.path.join(MODEL_DIR, f'scaler_lstm_{battery_id}_soh.pkl')
-    data_path = os.path.join(DATA_DIR, f'optimized_nasa_battery_data_{battery_id}_preprocessed.csv')
+    """Synchronous part of resource loading (runs on the loading thread pool)."""
+    model_path, scaler_path = resource_paths(battery_id)
+    battery_label = metric_battery_label(battery_id)
+    load_start = time.perf_counter()
 
     try:
+        # Taken before reading so a file changing mid-load is detected on a later check
+        fingerprint = resource_fingerprint(battery_id)
         # Check if files exist before trying to load
         if not os.path.exists(model_path): raise FileNotFoundError(f"Model file not found: {model_path}")
         if not os.path.exists(scaler_path): raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-        if not os.path.exists(data_path): raise FileNotFoundError(f"Data file not found: {data_path}")
+        if not data_exists(DATA_DIR, battery_id): raise FileNotFoundError(f"Data file not found for {battery_id} in {DATA_DIR}")
 
-        model = keras.models.load_model(model_path)
-        with open(scaler_path, 'rb') as f:
+        with load_seconds.time(battery_id=battery_label, step="model"):
+            model = load_model(model_path)
+        with load_seconds.time(battery_id=battery_label, step="scaler"), open(scaler_path, 'rb') as f:
             scaler = pickle.load(f)
-        df_data = pd.read_csv(data_path)
 
-        # Store in cache upon successful load
-        models_cache[battery_id] = model
-        scalers_cache[battery_id] = scaler
-        data_cache[battery_id] = df_data
+        shared_path = shared_index_path(battery_id, fingerprint) if SHARED_INDEX_DIR else None
+        if shared_path is not None and os.path.isdir(shared_path):
+            # Another worker already built this version of the index: map it instead of reading the data
+            with load_seconds.time(battery_id=battery_label, step="index"):
+                cycle_index = CycleIndex.load(shared_path)
+            battery_data, data_source = None, shared_path
+        else:
+            # Memory-mapped columnar layout when available, CSV otherwise
+            with load_seconds.time(battery_id=battery_label, step="data"):
+                battery_data, cycle_offsets, data_source = load_battery_columns(DATA_DIR, battery_id)
+            cycle_offsets = cycle_offsets or {}
+            # Group, scale (and optionally pad) every cycle once so requests only slice
+            with load_seconds.time(battery_id=battery_label, step="index"):
+                cycle_index = CycleIndex.from_columns(battery_data, SEQUENCE_FEATURES, scaler=scaler,
+                                                      max_len=MAX_SEQ_LENGTHS.get(battery_id) if PREPAD_SEQUENCES else None,
+                                                      cycles=cycle_offsets.get('index_cycles'),
+                                                      offsets=cycle_offsets.get('index_offsets'))
+                if shared_path is not None:
+                    cycle_index = publish_shared_index(cycle_index, battery_id, shared_path)
+        logger.info("Loaded data for %s from %s", battery_id, data_source)
+
+        tree_engine = load_tree_engine(battery_id, battery_data)
+        if shared_path is not None:
+            battery_data = None # Only the shared index is kept, so the private columns can be freed
+
+        # Register the complete bundle only once everything loaded (may evict least recently used batteries)
+        bundle = BatteryBundle(battery_id, model, scaler, battery_data, cycle_index,
+                               data_source=data_source, fingerprint=fingerprint, tree_engine=tree_engine)
+        registry.put(bundle)
+        load_seconds.observe(time.perf_counter() - load_start, battery_id=battery_label, step="total")
+        loads_total.inc(battery_id=battery_label, result="success")
+        return bundle
 
     except Exception as e:
-        print(f"Error loading resources sync for {battery_id}: {e}")
-        # Ensure partial loads are cleaned up if error occurs
-        if battery_id in models_cache: del models_cache[battery_id]
-        if battery_id in scalers_cache: del scalers_cache[battery_id]
-        if battery_id in data_cache: del data_cache[battery_id]
+        loads_total.inc(battery_id=battery_label, result="failure")
+        logger.error("Error loading resources sync for %s: %s", battery_id, e)
         # Re-raise the exception so the async task knows it failed
         raise e
 
 
-app = FastAPI(title="Battery SoH Prediction API")
+def build_batch(bundle: BatteryBundle, cycle_numbers: list) -> np.ndarray:
+    """Returns the scaled, padded (n, max_len, n_features) batch for indexed cycles."""
+    max_len = MAX_SEQ_LENGTHS.get(bundle.battery_id)
+    if max_len is None:
+        raise ValueError(f"Max sequence length not configured for {bundle.battery_id}")
+    return bundle.cycle_index.batch(cycle_numbers, max_len)
+
+def predict_cycles(bundle: BatteryBundle, cycle_numbers: list, endpoint: str = "batch", engine: str = "lstm") -> list:
+    """Predicts the SoH of indexed cycles, skipping padding work when LENGTH_AWARE_INFERENCE is on."""
+    if engine == "fast":
+        # Scored at load time: a lookup, cheap enough to run on the event loop
+        with stage_seconds.time(endpoint=endpoint, stage="fast_lookup"):
+            return bundle.tree_engine.predict(cycle_numbers).tolist()
+
+    with stage_seconds.time(endpoint=endpoint, stage="padding"):
+        batch_padded = build_batch(bundle, cycle_numbers)
+
+    # One forward pass over the whole batch: Keras would otherwise split it into steps of 32
+    with stage_seconds.time(endpoint=endpoint, stage="inference"):
+        if not LENGTH_AWARE_INFERENCE:
+            predictions = bundle.model.predict(batch_padded, batch_size=len(batch_padded), verbose=0)
+        elif isinstance(bundle.model, NumpyLSTMModel):
+            lengths = bundle.cycle_index.lengths_of(cycle_numbers, batch_padded.shape[1])
+            predictions = bundle.model.predict(batch_padded, lengths=lengths)
+        else:
+            # Keras: trailing padding is masked out, so cutting it off does not change the result. One call
+            # trimmed to the batch's longest length bucket: per-call overhead outweighs splitting into buckets
+            max_len = batch_padded.shape[1]
+            lengths = bundle.cycle_index.lengths_of(cycle_numbers, max_len)
+            bucket_size = max(1, LENGTH_BUCKET_SIZE)
+            bucket_len = min(-(-int(lengths.max()) // bucket_size) * bucket_size, max_len)
+            predictions = bundle.model.predict(batch_padded[:, :bucket_len], batch_size=len(batch_padded), verbose=0)
+    return [float(p[0]) for p in predictions]
+
+def resolve_engine(bundle: BatteryBundle, requested: Optional[str]) -> str:
+    """The engine of a request: the requested one, else DEFAULT_PREDICTION_ENGINE ("lstm" if the battery has no fast engine)."""
+    if requested == "fast" and bundle.tree_engine is None:
+        raise HTTPException(status_code=404, detail=f"No fast ({TREE_MODEL}) model available for battery {bundle.battery_id}")
+    if requested is not None:
+        return requested
+    return "fast" if DEFAULT_PREDICTION_ENGINE == "fast" and bundle.tree_engine is not None else "lstm"
+
+def build_cycle_summary(bundle: BatteryBundle, engine: str = "lstm") -> dict:
+    """Actual and predicted SoH of every indexed cycle, predicted in one model call (runs on the inference pool)."""
+    cycles = [int(c) for c in bundle.cycle_index.cycles]
+    columns = bundle.data
+    if columns is None or 'soh' not in columns:
+        # Shared index (no private data columns): read just the two columns needed
+        columns, _, _ = load_battery_columns(DATA_DIR, bundle.battery_id, columns=['cycle_number', 'soh'])
+    soh_by_cycle = dict(zip(*(values.tolist() for values in cycle_soh(columns))))
+    predicted = predict_cycles(bundle, cycles, endpoint="summary", engine=engine) if cycles else []
+    predictions_total.inc(len(cycles), endpoint="summary", source="model" if engine == "lstm" else "fast")
+    return {
+        'cycle_numbers': np.array(cycles, dtype=np.int64),
+        'actual_soh': np.array([soh_by_cycle.get(c, np.nan) for c in cycles], dtype=np.float64),
+        'predicted_soh': np.array(predicted, dtype=np.float64),
+    }
+
+async def get_cycle_summary(bundle: BatteryBundle, engine: str = "lstm") -> dict:
+    """Returns a bundle's cycle summary, computing it once per loaded version (concurrent callers share the work)."""
+    if engine in bundle.summaries:
+        return bundle.summaries[engine]
+    key = (bundle.battery_id, bundle.fingerprint, engine)
+    task = summary_tasks.get(key)
+    if task is None:
+        task = asyncio.get_running_loop().run_in_executor(inference_executor, build_cycle_summary, bundle, engine)
+        summary_tasks[key] = task
+    try:
+        summary = await asyncio.shield(task)
+    finally:
+        if summary_tasks.get(key) is task:
+            del summary_tasks[key]
+    if engine not in bundle.summaries:
+        bundle.summaries[engine] = summary
+        if engine == "lstm":
+            # Back on the event loop: the result cache is not thread-safe, so it is never filled from the pool
+            for c, predicted_soh in zip(summary['cycle_numbers'].tolist(), summary['predicted_soh'].tolist()):
+                result_cache.put((bundle.battery_id, c, bundle.fingerprint), predicted_soh)
+    return bundle.summaries[engine]
+
+def downsample_positions(n: int, max_points: int) -> np.ndarray:
+    """Positions of at most `max_points` evenly spaced items out of `n`, keeping the first and last (0 keeps all)."""
+    if max_points <= 0 or n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(np.int64))
+
+def predict_batch(items: list) -> list:
+    """Scores (bundle, cycle_number) items, one model call per bundle (normally a single one)."""
+    results = [None] * len(items)
+    by_bundle = {}
+    for position, (bundle, cycle_number) in enumerate(items):
+        by_bundle.setdefault(id(bundle), (bundle, []))[1].append((position, cycle_number))
+    for bundle, entries in by_bundle.values():
+        predictions = predict_cycles(bundle, [cycle_number for _, cycle_number in entries], endpoint="single")
+        for (position, _), prediction in zip(entries, predictions):
+            results[position] = prediction
+    return results
+
+def stream_model(bundle: BatteryBundle) -> NumpyLSTMModel:
+    """Returns the stateful NumPy forward pass of a battery's model (converted once from Keras)."""
+    if isinstance(bundle.model, NumpyLSTMModel):
+        return bundle.model
+    if bundle.stream_model is None:
+        bundle.stream_model = NumpyLSTMModel.from_keras(bundle.model)
+    return bundle.stream_model
+
+def prune_stream_sessions():
+    """Drops streaming sessions idle for longer than STREAM_SESSION_TTL_S."""
+    now = time.monotonic()
+    for session_id in [sid for sid, session in stream_sessions.items()
+                       if now - session.touched_at > STREAM_SESSION_TTL_S]:
+        del stream_sessions[session_id]
+
+def get_stream_session(battery_id: str, session_id: str) -> StreamSession:
+    prune_stream_sessions()
+    session = stream_sessions.get(session_id)
+    if session is None or session.bundle.battery_id != battery_id:
+        raise HTTPException(status_code=404, detail=f"No open stream session {session_id} for battery {battery_id}")
+    return session
+
+def stream_response(session: StreamSession, predicted_soh, closed=False) -> StreamResponse:
+    return StreamResponse(
+        session_id=session.session_id,
+        battery_id=session.bundle.battery_id,
+        samples_received=len(session.stream),
+        samples_final=session.stream.n_final,
+        predicted_soh=round(predicted_soh, 4) if predicted_soh is not None else None,
+        closed=closed
+    )
+
+def get_batcher(battery_id: str) -> MicroBatcher:
+    """Returns the micro-batcher for a battery, creating it on first use."""
+    if battery_id not in batchers:
+        batchers[battery_id] = MicroBatcher(predict_batch, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+                                            executor=inference_executor)
+    return batchers[battery_id]
+
+
+def import_inference_framework():
+    """Imports TensorFlow for the Keras engine (runs on the loading thread pool)."""
+    if INFERENCE_ENGINE == 'keras':
+        import tensorflow as tf
+        configure_tensorflow_threads(tf)
+
+def warm_up_model(bundle: BatteryBundle):
+    """Runs dummy padded batches through a battery's model so its first request does not pay for tracing."""
+    max_len = MAX_SEQ_LENGTHS.get(bundle.battery_id)
+    if max_len is None:
+        return
+    lengths = [max_len]
+    if LENGTH_AWARE_INFERENCE and not isinstance(bundle.model, NumpyLSTMModel):
+        # Requests are trimmed to different bucket lengths: after a second input shape Keras
+        # switches to a shape-generic trace, so later lengths do not trace again
+        bucket_size = max(1, LENGTH_BUCKET_SIZE)
+        lengths.append(min(max_len - 1, -(-(max_len // 2) // bucket_size) * bucket_size) or 1)
+    for length in lengths:
+        bundle.model.predict(np.zeros((1, length, len(SEQUENCE_FEATURES)), dtype=np.float32), verbose=0)
+
+async def warm_up_battery(battery_id: str):
+    """Loads a battery and warms up its model, recording the progress in `warmup`."""
+    warmup.update(battery_id, "loading")
+    start = time.perf_counter()
+    bundle = await load_resources_async(battery_id)
+    loaded = time.perf_counter()
+    if bundle is None:
+        warmup.update(battery_id, "failed", load_s=loaded - start, error="Resources unavailable or failed to load")
+        return
+    if WARMUP_MODELS:
+        warmup.update(battery_id, "warming", load_s=loaded - start)
+        try:
+            await run_inference(warm_up_model, bundle)
+        except Exception as e:
+            logger.error("Model warm-up failed for %s: %s", battery_id, e)
+    warmup.update(battery_id, "ready", load_s=loaded - start, warmup_s=time.perf_counter() - loaded)
+
+async def warm_up_startup():
+    """Background startup warm-up: framework import, then the preloaded batteries; then their cycle summaries."""
+    try:
+        warmup.start(PRELOAD_BATTERIES)
+        if WARMUP_MODELS and INFERENCE_ENGINE == 'keras':
+            start = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(loading_executor, import_inference_framework)
+            warmup.framework_import_s = round(time.perf_counter() - start, 4)
+        await asyncio.gather(*(warm_up_battery(battery_id) for battery_id in PRELOAD_BATTERIES))
+    except Exception as e:
+        logger.error("Startup warm-up failed: %s", e)
+    finally:
+        warmup.finish()
+    logger.info("Warm-up finished after %.2fs, ready to serve", warmup.finished_at - warmup.started_at)
+
+    # Cycle summaries are precomputed after readiness: they score every cycle, which can take a while
+    for battery_id in PRELOAD_BATTERIES:
+        bundle = registry.peek(battery_id)
+        if bundle is not None:
+            try:
+                await get_cycle_summary(bundle, resolve_engine(bundle, None))
+            except Exception as e:
+                logger.error("Cycle summary precomputation failed for %s: %s", battery_id, e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the configured hot batteries without delaying startup; /health/ready reports when it finished
+    if PRELOAD_BATTERIES:
+        logger.info("Preloading and warming up %s in the background...", ", ".join(PRELOAD_BATTERIES))
+    warmup_task = asyncio.create_task(warm_up_startup())
+    yield
+    warmup_task.cancel()
+
+
+app = FastAPI(title="Battery SoH Prediction API", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template (e.g. /predict/soh/{battery_id}) keeps the label set bounded
+        route = request.scope.get("route")
+        request_seconds.observe(time.perf_counter() - start, method=request.method,
+                                route=route.path if route is not None else "unmatched", status=str(status))
 
 @app.get("/", summary="API Root/Health Check")
 def read_root():
     return {"message": "Welcome to the Battery SoH Prediction API"}
 
+@app.get("/health/live", summary="Liveness: the process is up and its event loop responds")
+async def liveness():
+    return {"status": "alive", "uptime_s": round(warmup.uptime(), 4)}
+
+@app.get("/health/ready", summary="Readiness: 200 once the startup warm-up finished, 503 while warming up")
+async def readiness():
+    """
+    Reports the startup warm-up: status of each preloaded battery (load and
+    warm-up seconds) and every battery's time to first prediction (seconds
+    since startup and the latency of that first request).
+    """
+    return JSONResponse(status_code=200 if warmup.done else 503, content=warmup.report())
+
 @app.post("/predict/soh/{battery_id}",
             response_model=PredictionResponse,
             summary="Predict SoH for a given cycle")
@@ -111,58 +638,331 @@ async def predict_soh(battery_id: str, request_body: PredictionRequest, backgrou
     of a given battery.
 
     - **battery_id**: ID of the battery (e.g., B0005, B0006, B0018).
-    - **request_body**: JSON containing the `cycle_number`.
+    - **request_body**: JSON containing the `cycle_number` and optionally the
+      `engine`: `lstm` (sequence model) or `fast` (cycle-level tree model).
     """
+    request_start = time.perf_counter()
     # Trigger resource loading if needed, wait if already loading
-    loaded = await load_resources_async(battery_id)
-    if not loaded:
+    with stage_seconds.time(endpoint="single", stage="resource_wait"):
+        bundle = await load_resources_async(battery_id)
+    if bundle is None:
         raise HTTPException(status_code=503, detail=f"Resources for battery {battery_id} are unavailable or failed to load.")
+    engine = resolve_engine(bundle, request_body.engine)
 
-    # Retrieve data for the cycle
-    cycle_number = request_body.cycle_number
-    df_battery = data_cache[battery_id]
-    cycle_data = df_battery[df_battery['cycle_number'] == cycle_number].copy()
-
-    if cycle_data.empty:
+    # Look up the cycle in the load-time index (already scaled), then the result cache
+    with stage_seconds.time(endpoint="single", stage="cycle_lookup"):
+        cycle_number = request_body.cycle_number
+        found = cycle_number in bundle.cycle_index
+        cache_key = (battery_id, cycle_number, bundle.fingerprint)
+        predicted_soh = result_cache.get(cache_key) if found and engine == "lstm" else None
+    if not found:
         raise HTTPException(status_code=404, detail=f"No data found for cycle {cycle_number} of battery {battery_id}")
 
-    sequence = cycle_data[SEQUENCE_FEATURES].values
-    if sequence.shape[0] == 0:
-         raise HTTPException(status_code=500, detail=f"Extracted sequence is empty for cycle {cycle_number}")
+    # Predict: the fast engine scored every cycle at load time; concurrent LSTM requests for the same
+    # battery share one padded batch and model call (padding and inference are timed in predict_cycles)
+    if engine == "fast":
+        predicted_soh = predict_cycles(bundle, [cycle_number], endpoint="single", engine="fast")[0]
+        predictions_total.inc(endpoint="single", source="fast")
+    elif predicted_soh is None:
+        try:
+            with stage_seconds.time(endpoint="single", stage="micro_batch"):
+                predicted_soh = await get_batcher(battery_id).submit((bundle, cycle_number))
+        except Exception as e:
+            logger.error("Prediction error for %s, cycle %s: %s", battery_id, cycle_number, e)
+            raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+        result_cache.put(cache_key, predicted_soh)
+        predictions_total.inc(endpoint="single", source="model")
+    else:
+        predictions_total.inc(endpoint="single", source="cache")
 
-    # Preprocess: Scale and Pad
-    try:
-        scaler = scalers_cache[battery_id]
-        model = models_cache[battery_id]
-        max_len = MAX_SEQ_LENGTHS.get(battery_id)
-        if max_len is None:
-            raise ValueError(f"Max sequence length not configured for {battery_id}")
+    # Return result, serialized here so the time is measured (and FastAPI does not re-validate it)
+    with stage_seconds.time(endpoint="single", stage="serialization"):
+        result = PredictionResponse(
+            battery_id=battery_id,
+            cycle_number=cycle_number,
+            predicted_soh=round(predicted_soh, 4),
+            engine=engine
+        )
+        response = Response(content=result.model_dump_json(), media_type="application/json")
+    warmup.record_prediction(battery_id, time.perf_counter() - request_start)
+    logger.debug("Prediction result: %s", result)
+    return response
 
-        sequence_scaled = scaler.transform(sequence)
-        sequence_reshaped = sequence_scaled.reshape(1, sequence.shape[0], sequence.shape[1])
-        sequence_padded = pad_sequences(sequence_reshaped, maxlen=max_len, padding='post', dtype='float32', value=0.0)
+@app.post("/predict/soh/{battery_id}/batch",
+            response_model=BatchPredictionResponse,
+            summary="Predict SoH for many cycles in one model call")
+async def predict_soh_batch(battery_id: str, request_body: BatchPredictionRequest):
+    """
+    Predicts the SoH for several discharge cycles of a battery with a single
+    forward pass through the model.
 
-    except Exception as e:
-        print(f"Preprocessing error for {battery_id}, cycle {cycle_number}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to preprocess sequence data: {e}")
+    - **battery_id**: ID of the battery (e.g., B0005, B0006, B0018).
+    - **request_body**: JSON containing either `cycle_numbers` (a list) or
+      `start_cycle`/`end_cycle` (an inclusive range). Omit both to score every cycle.
+      Optionally the `engine`: `lstm` (sequence model) or `fast` (cycle-level tree model).
+    """
+    request_start = time.perf_counter()
+    with stage_seconds.time(endpoint="batch", stage="resource_wait"):
+        bundle = await load_resources_async(battery_id)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"Resources for battery {battery_id} are unavailable or failed to load.")
+    engine = resolve_engine(bundle, request_body.engine)
+
+    cycle_index = bundle.cycle_index
+    available_cycles = cycle_index.cycles
+
+    # Resolve the requested cycles
+    if request_body.cycle_numbers is not None:
+        requested_cycles = list(dict.fromkeys(request_body.cycle_numbers)) # De-duplicate, keep order
+    else:
+        start_cycle = request_body.start_cycle if request_body.start_cycle is not None else int(available_cycles.min())
+        end_cycle = request_body.end_cycle if request_body.end_cycle is not None else int(available_cycles.max())
+        if start_cycle > end_cycle:
+            raise HTTPException(status_code=400, detail=f"start_cycle ({start_cycle}) must not be greater than end_cycle ({end_cycle})")
+        requested_cycles = [int(c) for c in available_cycles if start_cycle <= c <= end_cycle]
+
+    if not requested_cycles:
+        raise HTTPException(status_code=400, detail="No cycles requested")
+
+    cycles = [c for c in requested_cycles if c in cycle_index]
+    missing_cycles = [c for c in requested_cycles if c not in cycle_index]
+    if not cycles:
+        raise HTTPException(status_code=404, detail=f"No data found for the requested cycles of battery {battery_id}")
+
+    if engine == "fast":
+        soh_by_cycle = dict(zip(cycles, predict_cycles(bundle, cycles, endpoint="batch", engine="fast")))
+        cycles_to_score = []
+        predictions_total.inc(len(cycles), endpoint="batch", source="fast")
+    else:
+        # Only cycles without a cached result go through the model
+        with stage_seconds.time(endpoint="batch", stage="cycle_lookup"):
+            soh_by_cycle = {c: result_cache.get((battery_id, c, bundle.fingerprint)) for c in cycles}
+            cycles_to_score = [c for c in cycles if soh_by_cycle[c] is None]
+        predictions_total.inc(len(cycles) - len(cycles_to_score), endpoint="batch", source="cache")
+
+    if cycles_to_score:
+        # Gather the pre-scaled cycles into one padded tensor and predict them in one pass
+        try:
+            predictions = await run_inference(predict_cycles, bundle, cycles_to_score)
+        except Exception as e:
+            logger.error("Batch prediction error for %s: %s", battery_id, e)
+            raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+
+        for c, predicted_soh in zip(cycles_to_score, predictions):
+            soh_by_cycle[c] = predicted_soh
+            result_cache.put((battery_id, c, bundle.fingerprint), predicted_soh)
+        predictions_total.inc(len(cycles_to_score), endpoint="batch", source="model")
+
+    with stage_seconds.time(endpoint="batch", stage="serialization"):
+        result = BatchPredictionResponse(
+            battery_id=battery_id,
+            predictions=[
+                CyclePrediction(cycle_number=c, predicted_soh=round(soh_by_cycle[c], 4))
+                for c in cycles
+            ],
+            missing_cycles=missing_cycles,
+            engine=engine
+        )
+        response = Response(content=result.model_dump_json(), media_type="application/json")
+    warmup.record_prediction(battery_id, time.perf_counter() - request_start)
+    logger.debug("Batch prediction for %s: %d cycles scored, %d missing", battery_id, len(cycles), len(missing_cycles))
+    return response
+
+@app.get("/summary/soh/{battery_id}",
+            response_model=CycleSummaryResponse,
+            summary="Cycle list with actual and predicted SoH trend (cached per battery)")
+async def cycle_summary(battery_id: str, max_points: int = 0, engine: Optional[Literal["lstm", "fast"]] = None):
+    """
+    Returns every cycle of a battery and its actual and predicted SoH trend,
+    so clients can plot the whole curve without the raw data.
+
+    The predictions for all cycles are computed in one model call the first
+    time a loaded battery is asked for and kept with it until it is reloaded.
+
+    - **battery_id**: ID of the battery (e.g., B0005, B0006, B0018).
+    - **max_points**: Downsample the trend to at most this many evenly spaced cycles (0 returns every cycle).
+    - **engine**: `lstm` (sequence model) or `fast` (cycle-level tree model).
+    """
+    request_start = time.perf_counter()
+    if max_points < 0:
+        raise HTTPException(status_code=400, detail="max_points must not be negative")
+    with stage_seconds.time(endpoint="summary", stage="resource_wait"):
+        bundle = await load_resources_async(battery_id)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"Resources for battery {battery_id} are unavailable or failed to load.")
+    engine = resolve_engine(bundle, engine)
 
-    # Predict
     try:
-        prediction = model.predict(sequence_padded)
-        predicted_soh = float(prediction[0][0])
+        summary = await get_cycle_summary(bundle, engine)
     except Exception as e:
-        print(f"Prediction error for {battery_id}, cycle {cycle_number}: {e}")
+        logger.error("Cycle summary error for %s: %s", battery_id, e)
         raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
 
-    # Return result
-    result = PredictionResponse(
-        battery_id=battery_id,
-        cycle_number=cycle_number,
-        predicted_soh=round(predicted_soh, 4)
-    )
-    print(f"Prediction result: {result}")
-    return result
+    with stage_seconds.time(endpoint="summary", stage="serialization"):
+        cycle_numbers = summary['cycle_numbers']
+        positions = downsample_positions(len(cycle_numbers), max_points)
+        actual_soh = summary['actual_soh'][positions].round(4)
+        result = CycleSummaryResponse(
+            battery_id=battery_id,
+            cycle_numbers=cycle_numbers.tolist(),
+            trend_cycles=cycle_numbers[positions].tolist(),
+            actual_soh=[None if np.isnan(soh) else soh for soh in actual_soh.tolist()],
+            predicted_soh=summary['predicted_soh'][positions].round(4).tolist(),
+            engine=engine
+        )
+        response = Response(content=result.model_dump_json(), media_type="application/json")
+    warmup.record_prediction(battery_id, time.perf_counter() - request_start)
+    return response
+
+@app.post("/stream/soh/{battery_id}",
+            response_model=StreamResponse,
+            summary="Open a live SoH estimation session for an in-progress discharge cycle")
+async def open_stream(battery_id: str):
+    """
+    Opens a session that accepts the raw measurements of one discharge cycle
+    in chunks (`POST /stream/soh/{battery_id}/{session_id}`) and returns an
+    updated SoH estimate after each chunk. Samples are smoothed, scaled and run
+    through the LSTM incrementally, so a chunk costs work proportional to its size.
+
+    Sessions are held by the worker process that opened them: with several
+    workers this returns 501 unless STREAM_STICKY_SESSIONS is set.
+
+    - **battery_id**: ID of the battery (e.g., B0005, B0006, B0018).
+    """
+    if WEB_CONCURRENCY > 1 and not STREAM_STICKY_SESSIONS:
+        raise HTTPException(status_code=501, detail="Streaming needs a single worker (WEB_CONCURRENCY=1) or sticky "
+                                                    "connections (STREAM_STICKY_SESSIONS=1): sessions are per worker")
+    bundle = await load_resources_async(battery_id)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail=f"Resources for battery {battery_id} are unavailable or failed to load.")
+    max_len = MAX_SEQ_LENGTHS.get(battery_id)
+    if max_len is None:
+        raise HTTPException(status_code=500, detail=f"Max sequence length not configured for {battery_id}")
+
+    prune_stream_sessions()
+    if STREAM_MAX_SESSIONS and len(stream_sessions) >= STREAM_MAX_SESSIONS:
+        raise HTTPException(status_code=429, detail="Too many open stream sessions")
+    try:
+        model = await run_inference(stream_model, bundle)
+    except ValueError as e:
+        raise HTTPException(status_code=501, detail=f"Streaming is not supported for this model: {e}")
+    session = StreamSession(bundle, CycleStream(model, bundle.scaler, max_len))
+    stream_sessions[session.session_id] = session
+    logger.info("Opened stream session %s for %s", session.session_id, battery_id)
+    return stream_response(session, None)
+
+@app.post("/stream/soh/{battery_id}/{session_id}",
+            response_model=StreamResponse,
+            summary="Add samples to a live session and get the updated SoH estimate")
+async def stream_samples(battery_id: str, session_id: str, chunk: SampleChunk):
+    """
+    Appends a chunk of raw measurements to the session's cycle and returns the
+    SoH estimate for the cycle so far. The session keeps using the model version
+    it was opened with, even if the battery's files are reloaded meanwhile.
+
+    - **chunk**: Equal-length lists of `measurement_time_relative`,
+      `voltage_measured`, `current_measured` and `temperature_measured`;
+      set `end_of_cycle` on the last chunk to close the session.
+    """
+    session = get_stream_session(battery_id, session_id)
+    columns = [chunk.voltage_measured, chunk.current_measured, chunk.temperature_measured, chunk.measurement_time_relative]
+    if len({len(column) for column in columns}) != 1:
+        raise HTTPException(status_code=400, detail="All measurement lists must have the same length")
+
+    def apply_chunk():
+        session.stream.add(*columns)
+        return session.stream.estimate()
+
+    async with session.lock:
+        session.touched_at = time.monotonic()
+        try:
+            with stage_seconds.time(endpoint="stream", stage="chunk"):
+                predicted_soh = await run_inference(apply_chunk)
+        except Exception as e:
+            logger.error("Streaming error for %s, session %s: %s", battery_id, session_id, e)
+            raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+        if chunk.end_of_cycle:
+            stream_sessions.pop(session_id, None)
+    return stream_response(session, predicted_soh, closed=chunk.end_of_cycle)
+
+@app.delete("/stream/soh/{battery_id}/{session_id}",
+            response_model=StreamResponse,
+            summary="Close a live session")
+async def close_stream(battery_id: str, session_id: str):
+    session = get_stream_session(battery_id, session_id)
+    async with session.lock:
+        stream_sessions.pop(session_id, None)
+        predicted_soh = await run_inference(session.stream.estimate)
+    return stream_response(session, predicted_soh, closed=True)
+
+# The metrics endpoints read dicts owned by the event loop (batchers, stream sessions), so they run on it too
+@app.get("/metrics/batching", summary="Micro-batching queue and batch size metrics")
+async def batching_metrics():
+    return {
+        "max_batch_size": MICRO_BATCH_MAX_SIZE,
+        "max_wait_ms": MICRO_BATCH_MAX_WAIT_MS,
+        "batteries": {battery_id: batcher.stats() for battery_id, batcher in list(batchers.items())}
+    }
+
+@app.get("/metrics/prediction-cache", summary="Prediction result cache size and hit-rate")
+def prediction_cache_metrics():
+    return result_cache.stats()
+
+@app.get("/admin/registry", summary="Resident batteries, their estimated footprint and cache hit/miss counts")
+def registry_status():
+    return registry.stats()
+
+@app.get("/metrics", summary="Prometheus metrics: request and stage latency histograms, load times, counters")
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.post("/admin/profiler/start", summary="Start the sampling profiler")
+def start_profiler(interval_ms: float = PROFILER_INTERVAL_MS):
+    """Starts sampling every thread's stack every `interval_ms`, discarding the previous profile."""
+    if interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms must be positive")
+    if not profiler.start(interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    logger.info("Sampling profiler started (every %.1f ms)", interval_ms)
+    return profiler.report(limit=0)
+
+@app.post("/admin/profiler/stop", summary="Stop the sampling profiler and return its profile")
+def stop_profiler(limit: int = 50):
+    if not profiler.stop():
+        raise HTTPException(status_code=409, detail="Profiler is not running")
+    logger.info("Sampling profiler stopped after %d samples", profiler.samples)
+    return profiler.report(limit=limit)
+
+@app.get("/admin/profiler", summary="Profile collected so far (hottest functions and collapsed stacks)")
+def profiler_report(limit: int = 50):
+    return profiler.report(limit=limit)
+
+def serve():
+    """
+    Starts the API. With WEB_CONCURRENCY > 1, uvicorn runs that many worker
+    processes. Each worker gets an equal share of the cores for its
+    TensorFlow/BLAS thread pools, and they share one memory-mapped cycle index
+    per battery (in /dev/shm unless SHARED_INDEX_DIR is set).
+    """
+    import uvicorn # Not needed when the app is imported by a running server (workers, `uvicorn main:app`)
+
+    if WEB_CONCURRENCY <= 1:
+        logger.info("Starting API server with uvicorn...")
+        uvicorn.run(app, host="0.0.0.0", port=PORT)
+        return
+
+    # Workers import this module afresh, so settings are handed over through the environment
+    threads = str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))
+    os.environ.setdefault("TF_INTRA_OP_THREADS", threads)
+    os.environ.setdefault("TF_INTER_OP_THREADS", "1")
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(variable, threads) # NumPy engine / BLAS, read when a worker imports NumPy
+    if not SHARED_INDEX_DIR:
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        os.environ["SHARED_INDEX_DIR"] = os.path.join(shm_dir, "battery-api-index")
+    logger.info("Starting API server with %d uvicorn workers (%s TensorFlow threads each, shared index in %s)...",
+                WEB_CONCURRENCY, os.environ["TF_INTRA_OP_THREADS"], os.environ["SHARED_INDEX_DIR"])
+    uvicorn.run("main:app", host="0.0.0.0", port=PORT, workers=WEB_CONCURRENCY)
 
 if __name__ == "__main__":
-    print("Starting API server with uvicorn...")
-    uvicorn.run(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    serve()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that can be started and stopped while the server runs.
+
+    A background thread wakes up every `interval_s` and records the Python
+    stack of every other thread (event loop, inference and loading pools).
+    Nothing is instrumented, so the cost is one stack walk per thread per
+    sample and zero while stopped. Stacks are reported in the collapsed
+    format ("outer;...;inner count") read by flame graph tools.
+    """
+
+    def __init__(self, interval_s=0.01, max_depth=64):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_s=None):
+        """Clears previous samples and starts sampling. Returns False if already running."""
+        if self.running:
+            return False
+        if interval_s is not None:
+            self.interval_s = interval_s
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stops sampling. Returns False if it was not running."""
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join()
+        self.stopped_at = time.time()
+        return True
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks.append(f"{names.get(thread_id, thread_id)};{self._collapse(frame)}")
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def _collapse(self, frame):
+        functions = []
+        while frame is not None and len(functions) < self.max_depth:
+            code = frame.f_code
+            functions.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(functions))
+
+    def report(self, limit=50):
+        """
+        Returns the profile collected so far.
+
+        Returns:
+            dict: Status, sample counts, the `limit` most frequent collapsed
+                  stacks and the functions most often on top of a stack.
+        """
+        with self._lock:
+            stacks = self._stacks.most_common()
+            samples = self.samples
+        leaves = Counter()
+        for stack, count in stacks:
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        end = self.stopped_at or time.time()
+        return {
+            'running': self.running,
+            'interval_ms': self.interval_s * 1e3,
+            'samples': samples,
+            'duration_s': round(end - self.started_at, 3) if self.started_at else 0.0,
+            'top_functions': [{'function': function, 'samples': count} for function, count in leaves.most_common(limit)],
+            'collapsed_stacks': [f"{stack} {count}" for stack, count in stacks[:limit]],
+        }
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger("battery_api")
+
+
+class BatteryBundle:
+    """Everything loaded for one battery: model, scaler, data columns and cycle index."""
+
+    def __init__(self, battery_id, model, scaler, data, cycle_index, data_source=None, fingerprint=None,
+                 tree_engine=None):
+        self.battery_id = battery_id
+        self.fingerprint = fingerprint # Version of the model/scaler/data files this bundle was loaded from
+        self.checked_at = time.monotonic() # Last time the files were compared against `fingerprint`
+        self.model = model
+        self.scaler = scaler
+        self.data = data
+        self.cycle_index = cycle_index
+        self.tree_engine = tree_engine # Predictions of the cycle-level tree model ("fast" engine), if it has one
+        self.stream_model = None # NumPy copy of a Keras model for streaming sessions, built on first use
+        self.summaries = {} # Actual and predicted SoH of every cycle per prediction engine, computed on first use
+        self.data_source = data_source
+        self.loaded_at = time.time()
+        self.hits = 0
+        self.footprint = estimate_footprint(self)
+
+
+def estimate_footprint(bundle):
+    """
+    Estimates the resident bytes of a bundle: model weights, the cycle index,
+    the fast engine's per-cycle predictions and data columns held in private
+    memory. Memory-mapped arrays (columnar data, a shared cycle index) are
+    shared page cache: they are reported as 'shared_bytes' and not counted in
+    the total. Keras/TensorFlow runtime overhead is not included either.
+
+    Returns:
+        dict: Byte counts per component and their 'total'.
+    """
+    model_bytes = sum(int(np.asarray(w).nbytes) for w in bundle.model.get_weights()) if bundle.model is not None else 0
+    index = bundle.cycle_index
+    index_arrays = []
+    if index is not None:
+        index_arrays = [index.values, index.offsets, index.cycles]
+        if index.padded is not None:
+            index_arrays.append(index.padded)
+    data_arrays = [column for column in (bundle.data or {}).values() if isinstance(column, np.ndarray)]
+    index_bytes = sum(a.nbytes for a in index_arrays if not isinstance(a, np.memmap))
+    data_bytes = sum(a.nbytes for a in data_arrays if not isinstance(a, np.memmap))
+    shared_bytes = sum(a.nbytes for a in index_arrays + data_arrays if isinstance(a, np.memmap))
+    tree = bundle.tree_engine
+    tree_bytes = tree.cycles.nbytes + tree.predictions.nbytes if tree is not None else 0
+    return {
+        'model_bytes': model_bytes,
+        'index_bytes': index_bytes,
+        'data_bytes': data_bytes,
+        'tree_bytes': tree_bytes,
+        'shared_bytes': shared_bytes,
+        'total': model_bytes + index_bytes + data_bytes + tree_bytes,
+    }
+
+
+class ModelRegistry:
+    """
+    Bounded LRU cache of battery bundles.
+
+    Whole bundles are evicted, least recently used first, whenever the number
+    of resident batteries exceeds `max_entries` or their estimated footprint
+    exceeds `max_bytes`. A limit of 0 disables it. The most recently added
+    bundle is never evicted, even if it alone exceeds the memory budget.
+
+    Safe to use from the event loop and the loading threads.
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, battery_id):
+        return battery_id in self._bundles
+
+    def __len__(self):
+        return len(self._bundles)
+
+    def get(self, battery_id):
+        """Returns the bundle and marks it most recently used, or None (counted as a miss)."""
+        with self._lock:
+            bundle = self._bundles.get(battery_id)
+            if bundle is None:
+                self.misses += 1
+                return None
+            self._bundles.move_to_end(battery_id)
+            self.hits += 1
+            bundle.hits += 1
+            return bundle
+
+    def peek(self, battery_id):
+        """Returns the bundle without touching LRU order or hit/miss counts."""
+        return self._bundles.get(battery_id)
+
+    def put(self, bundle):
+        """Adds (or replaces) a bundle and evicts least recently used ones over budget."""
+        with self._lock:
+            self._bundles[bundle.battery_id] = bundle
+            self._bundles.move_to_end(bundle.battery_id)
+            evicted = self._evict_over_budget()
+        for battery_id in evicted:
+            logger.info("Evicted resources for %s from the model registry.", battery_id)
+        return evicted
+
+    def remove(self, battery_id):
+        with self._lock:
+            return self._bundles.pop(battery_id, None)
+
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self):
+        # Callers hold the lock: a load thread may be adding or evicting bundles
+        return sum(bundle.footprint['total'] for bundle in self._bundles.values())
+
+    def _evict_over_budget(self):
+        evicted = []
+        while len(self._bundles) > 1 and (
+            (self.max_entries and len(self._bundles) > self.max_entries)
+            or (self.max_bytes and self._total_bytes() > self.max_bytes)
+        ):
+            battery_id, _ = self._bundles.popitem(last=False)
+            self.evictions += 1
+            evicted.append(battery_id)
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'resident_bytes': self._total_bytes(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                # Least recently used first
+                'batteries': [
+                    {
+                        'battery_id': battery_id,
+                        'hits': bundle.hits,
+                        'loaded_at': bundle.loaded_at,
+                        'data_source': bundle.data_source,
+                        'fingerprint': bundle.fingerprint,
+                        'footprint': bundle.footprint,
+                    }
+                    for battery_id, bundle in self._bundles.items()
+                ],
+            }
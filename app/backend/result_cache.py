@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of prediction results.
+
+    Keys are (battery_id, cycle_number, fingerprint) where the fingerprint
+    identifies the model/scaler/data files a result was computed from, so a
+    changed file can never serve an old result.
+
+    Args:
+        max_entries (int): Maximum cached results (0 disables the cache).
+        ttl_seconds (float): Lifetime of a result (0 = no expiry).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss or expired entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, battery_id, keep_fingerprint=None):
+        """Drops a battery's results, except those computed with `keep_fingerprint`."""
+        stale = [key for key in self._entries if key[0] == battery_id and key[2] != keep_fingerprint]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,186 @@
+"""
+Offline bulk scoring: predicts the SoH of every cycle of every battery with a
+model in MODEL_DIR and writes predicted vs. actual SoH curves as a columnar
+dataset (one file per battery in the output directory).
+
+Uses the API's own loading and prediction code (load_resources_sync,
+predict_cycles), so the results match the endpoints. Batteries are scored in
+parallel worker processes and every battery's cycles in large batches.
+
+Resumable: a manifest records the resource fingerprint each battery was
+scored with, and batteries whose files did not change are skipped on the next
+run (--force rescores everything).
+
+Usage (from app/backend):
+    MODEL_DIR=../models DATA_DIR=../data/processed_data python score_fleet.py --output-dir ../data/soh_curves
+    python -c "import pandas as pd; print(pd.read_parquet('../data/soh_curves'))"
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+MODEL_DIR = os.environ.get("MODEL_DIR", '/app/models/')
+# Hidden, so readers of the output directory as a dataset skip it
+MANIFEST_NAME = ".scoring_manifest.json"
+
+
+def discover_batteries(engine):
+    """Battery IDs with a model file for the engine in MODEL_DIR."""
+    extension = 'npz' if engine == 'numpy' else 'keras'
+    pattern = re.compile(rf'lstm_final_(.+)_soh\.{extension}$')
+    paths = sorted(glob.glob(os.path.join(MODEL_DIR, f'lstm_final_*_soh.{extension}')))
+    return [pattern.match(os.path.basename(path)).group(1) for path in paths]
+
+
+def output_path(output_dir, battery_id, output_format):
+    return os.path.join(output_dir, f"soh_{battery_id}.{output_format}")
+
+
+def write_columns(columns, path, output_format):
+    """Writes columns atomically (temporary file + rename), so an interrupted run leaves no partial file."""
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    if output_format == 'parquet':
+        import pandas as pd
+        pd.DataFrame(columns).to_parquet(tmp_path, index=False)
+    else:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def actual_soh(battery_id, cycle_numbers):
+    """First `soh` value of each cycle in the battery's data (NaN where a cycle has none)."""
+    from main import DATA_DIR
+    from data_store import load_battery_columns, cycle_soh
+
+    columns, _, _ = load_battery_columns(DATA_DIR, battery_id, columns=['cycle_number', 'soh'])
+    soh_by_cycle = dict(zip(*(values.tolist() for values in cycle_soh(columns))))
+    return np.array([soh_by_cycle.get(c, np.nan) for c in cycle_numbers], dtype=np.float64)
+
+
+def score_battery(battery_id, output_dir, output_format, batch_size):
+    """
+    Scores every cycle of one battery and writes its SoH curve. Runs in a worker process.
+
+    Returns:
+        dict: battery_id, fingerprint, cycles scored and load/score timings in seconds.
+    """
+    import main # Imported after main() set INFERENCE_ENGINE
+
+    start = time.perf_counter()
+    bundle = main.load_resources_sync(battery_id)
+    loaded = time.perf_counter()
+
+    cycle_numbers = [int(c) for c in bundle.cycle_index.cycles]
+    predicted = []
+    for i in range(0, len(cycle_numbers), batch_size):
+        predicted.extend(main.predict_cycles(bundle, cycle_numbers[i:i + batch_size]))
+    scored = time.perf_counter()
+
+    predicted = np.array(predicted, dtype=np.float64)
+    actual = actual_soh(battery_id, cycle_numbers)
+    write_columns({
+        'battery_id': np.array([battery_id] * len(cycle_numbers)),
+        'cycle_number': np.array(cycle_numbers, dtype=np.int64),
+        'predicted_soh': predicted,
+        'actual_soh': actual,
+        'error': predicted - actual,
+    }, output_path(output_dir, battery_id, output_format), output_format)
+
+    return {
+        'battery_id': battery_id,
+        'fingerprint': bundle.fingerprint,
+        'cycles': len(cycle_numbers),
+        'mae': float(np.nanmean(np.abs(predicted - actual))) if len(cycle_numbers) else None,
+        'load_s': loaded - start,
+        'score_s': scored - loaded,
+        'total_s': time.perf_counter() - start,
+    }
+
+
+def print_summary(results, skipped, failed, wall_time):
+    print("\n=== Scoring summary ===")
+    print(f"{'battery':<10}{'cycles':>8}{'load':>10}{'score':>10}{'cycles/s':>12}{'MAE':>10}")
+    for result in sorted(results, key=lambda r: r['battery_id']):
+        rate = result['cycles'] / result['score_s'] if result['score_s'] else 0.0
+        mae = f"{result['mae']:.4f}" if result['mae'] is not None else '-'
+        print(f"{result['battery_id']:<10}{result['cycles']:>8}{result['load_s']:>9.2f}s{result['score_s']:>9.2f}s"
+              f"{rate:>12.1f}{mae:>10}")
+    total_cycles = sum(r['cycles'] for r in results)
+    print(f"Scored: {len(results)} batteries, {total_cycles} cycles; skipped (up to date): {len(skipped)}, "
+          f"failed: {len(failed)}")
+    for battery_id, error in failed:
+        print(f"  {battery_id} failed: {error}")
+    print(f"Wall time: {wall_time:.2f}s ({total_cycles / wall_time if wall_time else 0.0:.1f} cycles/s end to end)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default="soh_curves")
+    parser.add_argument("--batteries", nargs="+", help="Batteries to score (default: every battery with a model)")
+    parser.add_argument("--engine", choices=["keras", "numpy"], default=os.environ.get("INFERENCE_ENGINE", "keras"))
+    parser.add_argument("--format", choices=["parquet", "npz"], default="parquet",
+                        help="Output format: parquet (needs pyarrow) or npz (one array per column)")
+    parser.add_argument("--batch-size", type=int, default=512, help="Cycles per model call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (one battery each)")
+    parser.add_argument("--force", action="store_true", help="Rescore batteries even if their results are up to date")
+    args = parser.parse_args()
+
+    # Workers import the backend after this, so they load models for the chosen engine
+    os.environ["INFERENCE_ENGINE"] = args.engine
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    batteries = args.batteries or discover_batteries(args.engine)
+    if not batteries:
+        print(f"No {args.engine} models found in {MODEL_DIR}")
+        return
+
+    from main import resource_fingerprint
+    to_score, skipped = [], []
+    for battery_id in batteries:
+        entry = manifest.get(battery_id)
+        up_to_date = (entry is not None and entry.get("engine") == args.engine and entry.get("format") == args.format
+                      and entry.get("fingerprint") == resource_fingerprint(battery_id)
+                      and os.path.exists(output_path(args.output_dir, battery_id, args.format)))
+        if up_to_date and not args.force:
+            skipped.append(battery_id)
+        else:
+            to_score.append(battery_id)
+    print(f"Scoring {len(to_score)} of {len(batteries)} batteries with the {args.engine} engine "
+          f"({len(skipped)} up to date)")
+
+    start = time.perf_counter()
+    results, failed = [], []
+    if to_score:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(to_score)))) as executor:
+            futures = {executor.submit(score_battery, battery_id, args.output_dir, args.format, args.batch_size): battery_id
+                       for battery_id in to_score}
+            for future in as_completed(futures):
+                battery_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed.append((battery_id, e))
+                    continue
+                results.append(result)
+                manifest[battery_id] = {"engine": args.engine, "format": args.format, **result}
+                # Save after every battery so an interrupted run keeps its progress
+                with open(manifest_path, "w") as f:
+                    json.dump(manifest, f, indent=2)
+
+    print_summary(results, skipped, failed, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import asyncio
+import time
+import uuid
+
+import numpy as np
+
+# Savitzky-Golay settings of scripts/data_utils.smooth_signals, used to build the training data
+SMOOTHING_WINDOW = 11
+SMOOTHING_POLYORDER = 2
+
+
+def savgol_weights(window_length, polyorder):
+    """
+    Returns the (window_length, window_length) Savitzky-Golay weights: row `j`
+    evaluates, at window position `j`, the polynomial fitted to the window.
+
+    The middle row is the filter for interior samples; the first and last rows
+    give the edge values of scipy's `savgol_filter(..., mode='interp')`.
+    """
+    x = np.arange(window_length) - window_length // 2
+    vander = np.vander(x, polyorder + 1)
+    return vander @ np.linalg.pinv(vander)
+
+
+class CycleStream:
+    """
+    Incremental SoH estimate of one in-progress discharge cycle.
+
+    Raw samples are smoothed, scaled and fed through the LSTM as they arrive.
+    A smoothed sample is final once the samples after it in its filter window
+    have arrived; from then on it is scaled and advanced into the carried LSTM
+    state exactly once. The last `window // 2` samples are still provisional
+    (their smoothing depends on where the cycle ends), so each estimate runs
+    only those few steps from a copy of the state. The estimate after the last
+    sample equals the prediction for the whole preprocessed cycle.
+
+    Cycles longer than `max_len` are scored over their last `max_len` steps,
+    like the padded batch path, so those estimates rerun the window.
+
+    Args:
+        model (NumpyLSTMModel): Forward pass with carried state.
+        scaler: Fitted scaler of the battery's model.
+        max_len (int): Sequence length the model scores.
+    """
+
+    def __init__(self, model, scaler, max_len, window_length=SMOOTHING_WINDOW, polyorder=SMOOTHING_POLYORDER):
+        self.model = model
+        self.scaler = scaler
+        self.max_len = max_len
+        self.window = window_length
+        self.half = window_length // 2
+        self.weights = savgol_weights(window_length, polyorder)
+        # (voltage, current, temperature, time) rows, in the order of main.SEQUENCE_FEATURES
+        self.raw = np.empty((0, 4), dtype=np.float64)
+        self.scaled = np.empty((0, 4), dtype=np.float32) # Final rows, scaled
+        self.state = model.initial_state()
+        self.last_voltage = None
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def n_final(self):
+        return len(self.scaled)
+
+    def add(self, voltage, current, temperature, time_relative, voltage_range=(0.0, 4.5)):
+        """
+        Appends raw samples and advances the state over the samples that became final.
+
+        Out-of-range voltages are replaced by the last valid reading (the offline
+        pipeline interpolates them, which needs samples that have not arrived yet).
+        """
+        voltage = np.asarray(voltage, dtype=np.float64).copy()
+        for j, value in enumerate(voltage):
+            if voltage_range[0] <= value <= voltage_range[1]:
+                self.last_voltage = value
+            elif self.last_voltage is not None:
+                voltage[j] = self.last_voltage
+        rows = np.column_stack([voltage, current, temperature, time_relative]).astype(np.float64)
+        self.raw = np.concatenate([self.raw, rows])
+
+        n = len(self.raw)
+        final_end = n - self.half if n >= self.window else 0
+        if final_end > self.n_final:
+            smoothed = self._smooth_final(self.n_final, final_end)
+            scaled = self._scale(smoothed)
+            if final_end <= self.max_len:
+                self.state = self.model.advance(self.state, scaled)
+            self.scaled = np.concatenate([self.scaled, scaled])
+
+    def estimate(self):
+        """Returns the SoH estimate for the samples received so far, or None before the first one."""
+        if len(self.raw) == 0:
+            return None
+        tail = self._scale(self._smooth_tail())
+        if len(self.raw) <= self.max_len:
+            h, _ = self.model.advance(self.state, tail)
+            return float(self.model.output(h)[0])
+        # Longer than the model window: keep the last max_len steps, as pad_sequences does
+        sequence = np.concatenate([self.scaled, tail])[-self.max_len:]
+        return float(self.model.predict(sequence[np.newaxis])[0, 0])
+
+    def _smooth_final(self, start, end):
+        raw, half = self.raw, self.half
+        smoothed = np.empty((end - start, raw.shape[1]))
+        for i in range(start, end):
+            if i < half:
+                # Leading edge: polynomial fitted to the first window
+                values = self.weights[i] @ raw[:self.window]
+            else:
+                values = self.weights[half] @ raw[i - half:i + half + 1]
+            smoothed[i - start] = values
+        smoothed[:, 3] = raw[start:end, 3] # Time is not smoothed
+        return smoothed
+
+    def _smooth_tail(self):
+        raw = self.raw
+        n = len(raw)
+        if n < self.window:
+            # Cycles shorter than the window keep their raw values
+            return raw[self.n_final:].copy()
+        # Trailing edge: polynomial fitted to the last window, as if the cycle ended here
+        smoothed = self.weights[self.window - self.half:] @ raw[n - self.window:]
+        smoothed[:, 3] = raw[n - self.half:, 3]
+        return smoothed
+
+    def _scale(self, rows):
+        if len(rows) == 0:
+            return np.empty((0, 4), dtype=np.float32)
+        if self.scaler is not None:
+            rows = self.scaler.transform(rows)
+        return np.asarray(rows, dtype=np.float32)
+
+
+class StreamSession:
+    """A `CycleStream` bound to the battery bundle (model version) it was opened with."""
+
+    def __init__(self, bundle, stream):
+        self.session_id = uuid.uuid4().hex
+        self.bundle = bundle
+        self.stream = stream
+        self.created_at = time.time()
+        self.touched_at = time.monotonic()
+        self.lock = asyncio.Lock() # Chunks of one session are applied in order, one at a time
@@ -0,0 +1,48 @@
+"""The columnar layout is preferred over the CSV only while it is at least as new as the CSV."""
+import json
+import os
+
+import numpy as np
+
+from data_store import columnar_dir, csv_path, data_source_path, load_battery_columns
+
+BATTERY_ID = "B0005"
+
+
+def write_csv(data_dir, soh):
+    with open(csv_path(data_dir, BATTERY_ID), "w") as f:
+        f.write("cycle_number,soh\n" + "".join(f"{i},{soh}\n" for i in (1, 1, 2)))
+
+
+def write_layout(data_dir, soh):
+    layout_dir = columnar_dir(data_dir, BATTERY_ID)
+    os.makedirs(layout_dir, exist_ok=True)
+    np.save(os.path.join(layout_dir, "cycle_number.npy"), np.array([1, 1, 2], dtype=np.int32))
+    np.save(os.path.join(layout_dir, "soh.npy"), np.full(3, soh, dtype=np.float32))
+    np.save(os.path.join(layout_dir, "index_cycles.npy"), np.array([1, 2], dtype=np.int32))
+    np.save(os.path.join(layout_dir, "index_offsets.npy"), np.array([0, 2, 3], dtype=np.int64))
+    with open(os.path.join(layout_dir, "meta.json"), "w") as f:
+        json.dump({"columns": ["cycle_number", "soh"], "n_rows": 3, "n_cycles": 2}, f)
+    return os.path.join(layout_dir, "meta.json")
+
+
+def test_columnar_layout_is_preferred_when_current(tmp_path):
+    write_csv(tmp_path, 0.9)
+    meta_path = write_layout(tmp_path, 0.9)
+    columns, index, _ = load_battery_columns(str(tmp_path), BATTERY_ID)
+    assert index is not None
+    assert data_source_path(str(tmp_path), BATTERY_ID) == meta_path
+
+
+def test_csv_rewritten_after_the_layout_is_served(tmp_path):
+    meta_path = write_layout(tmp_path, 0.9)
+    write_csv(tmp_path, 0.8)
+    layout_time = os.path.getmtime(meta_path)
+    os.utime(csv_path(tmp_path, BATTERY_ID), (layout_time + 10, layout_time + 10))
+
+    columns, index, source = load_battery_columns(str(tmp_path), BATTERY_ID)
+    assert index is None
+    assert source == csv_path(str(tmp_path), BATTERY_ID)
+    np.testing.assert_allclose(columns["soh"], 0.8)
+    # The resource fingerprint stats this path, so the change is picked up by a loaded battery too
+    assert data_source_path(str(tmp_path), BATTERY_ID) == csv_path(str(tmp_path), BATTERY_ID)
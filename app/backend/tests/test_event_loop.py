@@ -0,0 +1,45 @@
+"""Resource loading and inference run on thread pools: the event loop keeps serving while a battery loads."""
+import asyncio
+import threading
+import time
+
+import httpx
+
+import main
+
+# Generous for a loaded CI machine, far below the simulated load time
+MAX_ROOT_LATENCY_S = 0.5
+LOAD_TIMEOUT_S = 10
+
+
+def test_root_answers_while_a_battery_is_loading(monkeypatch):
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load(battery_id):
+        loading.set()
+        release.wait(LOAD_TIMEOUT_S) # Blocks a loading thread, like reading a large model
+        return None # Treated as a failed load
+
+    monkeypatch.setattr(main, "load_resources_sync", slow_load)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            prediction = asyncio.create_task(client.post("/predict/soh/B0005", json={"cycle_number": 1}))
+            try:
+                assert await asyncio.to_thread(loading.wait, LOAD_TIMEOUT_S), "loading never started"
+                start = time.perf_counter()
+                root = await client.get("/")
+                elapsed = time.perf_counter() - start
+                still_loading = not prediction.done()
+            finally:
+                release.set()
+            predicted = await prediction
+        return root, elapsed, still_loading, predicted
+
+    root, elapsed, still_loading, predicted = asyncio.run(scenario())
+    assert root.status_code == 200
+    assert still_loading
+    assert elapsed < MAX_ROOT_LATENCY_S
+    assert predicted.status_code == 503
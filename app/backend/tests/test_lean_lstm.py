@@ -0,0 +1,61 @@
+"""The NumPy LSTM runtime reproduces Keras' predictions, including masked padding."""
+import numpy as np
+import pytest
+
+from lean_lstm import NumpyLSTMModel, export_keras_model
+
+tf = pytest.importorskip("tensorflow")
+
+N_FEATURES = 4
+TIMESTEPS = 12
+TOLERANCE = 1e-5
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    keras = tf.keras
+    keras.utils.set_random_seed(0)
+    model = keras.Sequential([
+        keras.Input(shape=(TIMESTEPS, N_FEATURES)),
+        keras.layers.Masking(mask_value=0.0),
+        keras.layers.LSTM(8),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(1),
+    ])
+    # Random (non-zero) biases as well, so every weight tensor is exercised
+    rng = np.random.default_rng(0)
+    model.set_weights([rng.normal(scale=0.5, size=w.shape).astype(np.float32) for w in model.get_weights()])
+    return model
+
+
+@pytest.fixture(scope="module")
+def batch():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(6, TIMESTEPS, N_FEATURES)).astype(np.float32)
+    for row, length in enumerate([TIMESTEPS, 9, 5, 1]):
+        x[row, length:] = 0.0 # Post-padding, as pad_sequences(padding='post') writes it
+    x[4] = 0.0 # Fully masked row
+    x[5, 3] = 0.0 # A masked step in the middle of a sequence
+    return x
+
+
+def test_numpy_model_matches_keras(keras_model, batch):
+    expected = keras_model.predict(batch, verbose=0)
+    actual = NumpyLSTMModel.from_keras(keras_model).predict(batch)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+
+
+def test_exported_weights_round_trip(keras_model, batch, tmp_path):
+    path = tmp_path / "model.npz"
+    export_keras_model(keras_model, path)
+    loaded = NumpyLSTMModel.load(path)
+    np.testing.assert_array_equal(loaded.predict(batch), NumpyLSTMModel.from_keras(keras_model).predict(batch))
+    np.testing.assert_allclose(loaded.predict(batch), keras_model.predict(batch, verbose=0), atol=TOLERANCE)
+
+
+def test_unsupported_architecture_is_rejected():
+    keras = tf.keras
+    model = keras.Sequential([keras.Input(shape=(TIMESTEPS, N_FEATURES)), keras.layers.LSTM(4), keras.layers.Dense(1)])
+    with pytest.raises(ValueError, match="Unsupported layer stack"):
+        NumpyLSTMModel.from_keras(model)
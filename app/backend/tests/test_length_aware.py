@@ -0,0 +1,92 @@
+"""Skipping trailing padding (length-aware inference) does not change predictions."""
+import numpy as np
+import pytest
+
+import main
+from cycle_index import CycleIndex
+from lean_lstm import NumpyLSTMModel
+from registry import BatteryBundle
+
+BATTERY_ID = "TEST"
+MAX_LEN = 16
+UNITS = 6
+# Varied lengths, including one longer than MAX_LEN (padding keeps its last MAX_LEN steps)
+CYCLE_LENGTHS = {1: MAX_LEN, 2: 3, 3: 9, 4: MAX_LEN + 5, 5: 1, 6: 12}
+TOLERANCE = 1e-6
+
+
+def random_numpy_model(rng):
+    n_features = len(main.SEQUENCE_FEATURES)
+    weight = lambda *shape: rng.normal(scale=0.5, size=shape).astype(np.float32)  # noqa: E731
+    return NumpyLSTMModel({
+        'mask_value': np.float32(0.0),
+        'lstm_kernel': weight(n_features, 4 * UNITS), 'lstm_recurrent_kernel': weight(UNITS, 4 * UNITS),
+        'lstm_bias': weight(4 * UNITS), 'dense_kernel': weight(UNITS, 1), 'dense_bias': weight(1),
+    })
+
+
+def synthetic_index(rng, prepad):
+    cycle_numbers = np.concatenate([np.full(length, cycle) for cycle, length in CYCLE_LENGTHS.items()])
+    # Non-zero values, so only padding is masked
+    columns = {name: rng.uniform(0.5, 1.5, size=len(cycle_numbers)) for name in main.SEQUENCE_FEATURES}
+    columns['cycle_number'] = cycle_numbers
+    return CycleIndex.from_columns(columns, main.SEQUENCE_FEATURES, max_len=MAX_LEN if prepad else None)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture(autouse=True)
+def test_battery(monkeypatch):
+    monkeypatch.setitem(main.MAX_SEQ_LENGTHS, BATTERY_ID, MAX_LEN)
+
+
+def test_cycle_index_lengths(rng):
+    index = synthetic_index(rng, prepad=True)
+    cycles = list(CYCLE_LENGTHS)
+    np.testing.assert_array_equal(index.lengths_of(cycles, MAX_LEN), [min(n, MAX_LEN) for n in CYCLE_LENGTHS.values()])
+    batch = index.batch(cycles, MAX_LEN)
+    np.testing.assert_array_equal(batch[3], index.get(4)[-MAX_LEN:])
+    assert not batch[1, 3:].any()
+
+
+def test_numpy_lengths_match_full_padding(rng):
+    model = random_numpy_model(rng)
+    index = synthetic_index(rng, prepad=True)
+    cycles = list(CYCLE_LENGTHS)
+    batch = index.batch(cycles, MAX_LEN)
+    padded = model.predict(batch)
+    length_aware = model.predict(batch, lengths=index.lengths_of(cycles, MAX_LEN))
+    np.testing.assert_allclose(length_aware, padded, atol=TOLERANCE)
+
+
+def keras_model(rng):
+    tf = pytest.importorskip("tensorflow")
+    keras = tf.keras
+    model = keras.Sequential([
+        keras.Input(shape=(None, len(main.SEQUENCE_FEATURES))),
+        keras.layers.Masking(mask_value=0.0),
+        keras.layers.LSTM(UNITS),
+        keras.layers.Dropout(0.2),
+        keras.layers.Dense(1),
+    ])
+    model.set_weights([rng.normal(scale=0.5, size=w.shape).astype(np.float32) for w in model.get_weights()])
+    return model
+
+
+@pytest.mark.parametrize("engine", ["numpy", "keras"])
+@pytest.mark.parametrize("prepad", [True, False], ids=["prepadded", "padded_per_request"])
+def test_predict_cycles_length_aware_matches_padded(monkeypatch, rng, engine, prepad):
+    model = random_numpy_model(rng) if engine == "numpy" else keras_model(rng)
+    bundle = BatteryBundle(BATTERY_ID, model, None, None, synthetic_index(rng, prepad))
+    monkeypatch.setattr(main, "LENGTH_BUCKET_SIZE", 4) # Small buckets, so Keras batches are actually trimmed
+
+    # All cycles, only short ones (trimmed to a shorter bucket) and a single cycle
+    for cycles in (list(CYCLE_LENGTHS), [2, 5], [3]):
+        results = {}
+        for length_aware in (False, True):
+            monkeypatch.setattr(main, "LENGTH_AWARE_INFERENCE", length_aware)
+            results[length_aware] = main.predict_cycles(bundle, cycles)
+        np.testing.assert_allclose(results[True], results[False], atol=TOLERANCE)
@@ -0,0 +1,92 @@
+"""
+Live cycle streaming: estimates match the offline pipeline after every chunk,
+and sessions, which live in one worker's memory, need sticky connections
+with several workers.
+"""
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+import main
+from lean_lstm import NumpyLSTMModel
+from streaming import CycleStream, SMOOTHING_WINDOW, SMOOTHING_POLYORDER
+
+MAX_LEN = 40
+UNITS = 6
+# Uneven chunks: smaller than the smoothing window at first, 60 samples in total (longer than MAX_LEN)
+CHUNK_SIZES = [3, 1, 4, 7, 1, 14, 2, 20, 8]
+TOLERANCE = 1e-5
+
+
+def open_stream(battery_id):
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            return await client.post(f"/stream/soh/{battery_id}")
+    return asyncio.run(request())
+
+
+def test_streaming_is_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(main, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(main, "STREAM_STICKY_SESSIONS", False)
+    response = open_stream("B0005")
+    assert response.status_code == 501
+    assert "STREAM_STICKY_SESSIONS" in response.json()['detail']
+
+
+def test_sticky_sessions_allow_streaming_with_several_workers(monkeypatch):
+    monkeypatch.setattr(main, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(main, "STREAM_STICKY_SESSIONS", True)
+    monkeypatch.setattr(main, "load_resources_sync", lambda battery_id: None)
+    # Past the worker check: the (simulated) failed load answers 503
+    assert open_stream("B0005").status_code == 503
+
+
+def random_numpy_model(rng):
+    weight = lambda *shape: rng.normal(scale=0.5, size=shape).astype(np.float32)  # noqa: E731
+    return NumpyLSTMModel({
+        'mask_value': np.float32(0.0),
+        'lstm_kernel': weight(4, 4 * UNITS), 'lstm_recurrent_kernel': weight(UNITS, 4 * UNITS),
+        'lstm_bias': weight(4 * UNITS), 'dense_kernel': weight(UNITS, 1), 'dense_bias': weight(1),
+    })
+
+
+def offline_estimate(model, scaler, raw):
+    """The offline pipeline on the samples received so far: smooth, scale, keep the last MAX_LEN steps, score."""
+    from scipy.signal import savgol_filter
+    rows = raw.copy()
+    if len(rows) >= SMOOTHING_WINDOW:
+        for col in range(3): # Time is not smoothed
+            rows[:, col] = savgol_filter(rows[:, col], SMOOTHING_WINDOW, SMOOTHING_POLYORDER, mode='interp')
+    scaled = scaler.transform(rows).astype(np.float32)[-MAX_LEN:]
+    return float(model.predict(scaled[np.newaxis])[0, 0])
+
+
+def test_stream_estimates_match_the_offline_pipeline():
+    pytest.importorskip("scipy")
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    n = sum(CHUNK_SIZES)
+    steps = np.arange(n)
+    # Noisy discharge-like signals: voltage, current, temperature and relative time
+    raw = np.column_stack([
+        4.1 - 0.015 * steps + rng.normal(scale=0.02, size=n),
+        -2.0 + rng.normal(scale=0.05, size=n),
+        24 + 0.1 * steps + rng.normal(scale=0.2, size=n),
+        10.0 * steps,
+    ])
+    scaler = StandardScaler().fit(raw)
+    model = random_numpy_model(rng)
+
+    stream = CycleStream(model, scaler, MAX_LEN)
+    assert stream.estimate() is None
+    received = 0
+    for size in CHUNK_SIZES:
+        chunk = raw[received:received + size]
+        stream.add(chunk[:, 0], chunk[:, 1], chunk[:, 2], chunk[:, 3])
+        received += size
+        expected = offline_estimate(model, scaler, raw[:received])
+        assert stream.estimate() == pytest.approx(expected, abs=TOLERANCE), f"after {received} samples"
+    assert received > MAX_LEN
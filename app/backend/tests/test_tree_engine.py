@@ -0,0 +1,59 @@
+"""The fast engine imputes, scales and scores cycle features like the training pipeline."""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from tree_engine import TreeSoHEngine, cycle_features, FEATURE_SOURCE_COLUMNS
+
+# Model input order; ambient_temperature is not in the processed data, so it is always imputed
+MODEL_FEATURES = ['cycle_number', 'ambient_temperature', 'avg_voltage_measured', 'max_temp_measured', 'discharge_time_s']
+
+
+def synthetic_columns(rng, n_cycles=8, steps=20):
+    columns = {name: rng.uniform(1, 5, size=n_cycles * steps) for name in FEATURE_SOURCE_COLUMNS}
+    columns['cycle_number'] = np.repeat(np.arange(1, n_cycles + 1), steps)
+    return columns
+
+
+def write_pickles(tmp_path, rng, imputer_order):
+    training = pd.DataFrame(rng.uniform(1, 5, size=(40, len(MODEL_FEATURES))), columns=MODEL_FEATURES)
+    # On its own scale and informative, so filling it with another feature's mean changes the predictions
+    training['ambient_temperature'] = rng.uniform(20, 30, size=len(training))
+    imputer = SimpleImputer(strategy='mean').fit(training[imputer_order])
+    scaler = StandardScaler().fit(training)
+    model = LinearRegression().fit(pd.DataFrame(scaler.transform(training), columns=MODEL_FEATURES),
+                                   rng.uniform(0.7, 1.0, size=len(training)))
+    paths = []
+    for name, fitted in (('model', model), ('imputer', imputer), ('scaler', scaler)):
+        paths.append(str(tmp_path / f"{name}.pkl"))
+        with open(paths[-1], 'wb') as f:
+            pickle.dump(fitted, f)
+    return paths, model, scaler, training['ambient_temperature'].mean()
+
+
+@pytest.mark.parametrize("imputer_order", [MODEL_FEATURES, MODEL_FEATURES[::-1]], ids=["same_order", "other_order"])
+def test_missing_features_are_imputed_by_name(tmp_path, imputer_order):
+    rng = np.random.default_rng(0)
+    (model_path, imputer_path, scaler_path), model, scaler, ambient_mean = write_pickles(tmp_path, rng, imputer_order)
+    columns = synthetic_columns(rng)
+
+    engine = TreeSoHEngine.from_files(model_path, imputer_path, scaler_path, columns)
+
+    cycles, features = cycle_features(columns, MODEL_FEATURES)
+    features[:, MODEL_FEATURES.index('ambient_temperature')] = ambient_mean
+    expected = model.predict(pd.DataFrame(scaler.transform(pd.DataFrame(features, columns=MODEL_FEATURES)),
+                                          columns=MODEL_FEATURES))
+    np.testing.assert_array_equal(engine.cycles, cycles)
+    np.testing.assert_allclose(engine.predict(cycles), expected)
+
+
+def test_imputer_without_a_model_feature_is_rejected(tmp_path):
+    rng = np.random.default_rng(0)
+    paths, *_ = write_pickles(tmp_path, rng, [name for name in MODEL_FEATURES if name != 'ambient_temperature'])
+    with pytest.raises(ValueError, match="ambient_temperature"):
+        TreeSoHEngine.from_files(*paths, synthetic_columns(rng))
@@ -0,0 +1,134 @@
+import logging
+import pickle
+
+import numpy as np
+
+logger = logging.getLogger("battery_api")
+
+# Cycle-level health indicators the tree models were trained on (notebooks/4_model_development.ipynb,
+# aggregate_cycle_data): feature name -> (per-measurement column, reduction over the cycle)
+CYCLE_FEATURES = {
+    'cycle_number': ('cycle_number', 'first'),
+    'avg_voltage_measured': ('voltage_measured_smooth', 'mean'),
+    'min_voltage_measured': ('voltage_measured_smooth', 'min'),
+    'avg_current_measured': ('current_measured_smooth', 'mean'),
+    'avg_temp_measured': ('temperature_measured_smooth', 'mean'),
+    'max_temp_measured': ('temperature_measured_smooth', 'max'),
+    'delta_temp_measured': ('temperature_measured_smooth', 'range'),
+    'discharge_time_s': ('measurement_time_relative', 'max'),
+}
+
+# Per-measurement columns needed to compute CYCLE_FEATURES
+FEATURE_SOURCE_COLUMNS = sorted({column for column, _ in CYCLE_FEATURES.values()})
+
+
+def cycle_features(columns, names):
+    """
+    Computes cycle-level features for every cycle at once.
+
+    Rows are grouped by `cycle_number` with one sort and reduced per cycle
+    with `np.ufunc.reduceat`, so the cost is a few passes over the columns
+    regardless of the number of cycles. Features the processed data does not
+    have (e.g. `ambient_temperature`) are NaN and left to the imputer.
+
+    Args:
+        columns (Mapping): Column name -> array including FEATURE_SOURCE_COLUMNS.
+        names (list): Feature names, in model input order.
+
+    Returns:
+        tuple: (sorted cycle numbers, float64 array of shape (n_cycles, len(names)))
+    """
+    cycle_numbers = np.asarray(columns['cycle_number'])
+    order = None if np.all(cycle_numbers[1:] >= cycle_numbers[:-1]) else np.argsort(cycle_numbers, kind='stable')
+    if order is not None:
+        cycle_numbers = cycle_numbers[order]
+    starts = np.flatnonzero(np.r_[True, cycle_numbers[1:] != cycle_numbers[:-1]])
+    counts = np.diff(np.r_[starts, len(cycle_numbers)])
+    cycles = cycle_numbers[starts]
+
+    features = np.full((len(cycles), len(names)), np.nan)
+    for i, name in enumerate(names):
+        if name not in CYCLE_FEATURES:
+            continue
+        column, reduction = CYCLE_FEATURES[name]
+        values = np.asarray(columns[column], dtype=np.float64)
+        if order is not None:
+            values = values[order]
+        if reduction == 'first':
+            features[:, i] = values[starts]
+        elif reduction == 'mean':
+            features[:, i] = np.add.reduceat(values, starts) / counts
+        elif reduction == 'min':
+            features[:, i] = np.minimum.reduceat(values, starts)
+        elif reduction == 'max':
+            features[:, i] = np.maximum.reduceat(values, starts)
+        elif reduction == 'range':
+            features[:, i] = np.maximum.reduceat(values, starts) - np.minimum.reduceat(values, starts)
+    return cycles, features
+
+
+class TreeSoHEngine:
+    """
+    Low-latency SoH predictions from a cycle-level tree model (random forest
+    or XGBoost) with its imputer and scaler.
+
+    The features of every cycle are computed, imputed, scaled and scored in
+    one vectorized pass when the battery is loaded, so a request is a lookup
+    of its cycles' predictions. Only the predictions are kept.
+
+    Args:
+        cycles (np.ndarray): Sorted cycle numbers, shape (n_cycles,).
+        predictions (np.ndarray): Predicted SoH per cycle, shape (n_cycles,).
+    """
+
+    def __init__(self, cycles, predictions):
+        self.cycles = cycles
+        self.predictions = predictions
+        self.positions = {int(cycle): i for i, cycle in enumerate(cycles)}
+
+    @classmethod
+    def from_files(cls, model_path, imputer_path, scaler_path, columns):
+        """
+        Loads the pickled model, imputer and scaler and scores every cycle in `columns`.
+
+        The feature order is read from the fitted model (`feature_names_in_`).
+        """
+        import pandas as pd # Deferred like the model's own imports (scikit-learn), only loading pays for them
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        with open(imputer_path, 'rb') as f:
+            imputer = pickle.load(f)
+        with open(scaler_path, 'rb') as f:
+            scaler = pickle.load(f)
+
+        fitted_names = getattr(model, 'feature_names_in_', None)
+        names = list(imputer.feature_names_in_ if fitted_names is None else fitted_names)
+        missing = [name for name in names if name not in CYCLE_FEATURES]
+        if missing:
+            logger.debug("Cycle features %s are not in the processed data; imputed with their training means", missing)
+        cycles, features = cycle_features(columns, names)
+        if len(cycles) == 0:
+            return cls(cycles, np.empty(0))
+
+        # Fill missing features with the imputer's fitted values (what SimpleImputer.transform does; its private
+        # state is not stable across scikit-learn versions, the fitted statistics are). Matched by name: the
+        # imputer's column order need not be the model's
+        statistics = dict(zip(imputer.feature_names_in_, np.asarray(imputer.statistics_, dtype=np.float64)))
+        unknown = [name for name in names if name not in statistics]
+        if unknown:
+            raise ValueError(f"Imputer {imputer_path} was not fitted on features {unknown}")
+        features = np.where(np.isnan(features), np.array([statistics[name] for name in names]), features)
+        # DataFrames keep the fitted feature names, so sklearn validates the column order
+        prepared = pd.DataFrame(scaler.transform(pd.DataFrame(features, columns=names)), columns=names)
+        predictions = np.asarray(model.predict(prepared), dtype=np.float64).reshape(-1)
+        return cls(cycles, predictions)
+
+    def __contains__(self, cycle_number):
+        return int(cycle_number) in self.positions
+
+    def __len__(self):
+        return len(self.cycles)
+
+    def predict(self, cycle_numbers):
+        """Returns the predicted SoH of the given cycles (KeyError for unknown cycles)."""
+        return self.predictions[[self.positions[int(c)] for c in cycle_numbers]]
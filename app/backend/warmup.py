@@ -0,0 +1,56 @@
+import time
+
+
+class WarmupTracker:
+    """
+    Startup warm-up progress and time to first prediction per battery.
+
+    Backs the readiness endpoint: the API is ready once the warm-up finished
+    (failed batteries are reported but do not hold readiness back, they are
+    retried on their next request). Updated from the event loop only.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic() # Approximately process start: created when the app module is imported
+        self.finished_at = None
+        self.framework_import_s = None # TensorFlow import time, when the warm-up imported it
+        self.batteries = {}
+        self.first_predictions = {}
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def uptime(self):
+        return time.monotonic() - self.started_at
+
+    def start(self, battery_ids):
+        for battery_id in battery_ids:
+            self.batteries[battery_id] = {'status': 'pending'}
+
+    def update(self, battery_id, status, **fields):
+        """Sets a battery's warm-up status ('loading', 'warming', 'ready' or 'failed') and timings."""
+        entry = self.batteries.setdefault(battery_id, {})
+        entry['status'] = status
+        entry.update({name: round(value, 4) if isinstance(value, float) else value for name, value in fields.items()})
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    def record_prediction(self, battery_id, request_seconds):
+        """Records a battery's first successful prediction: time since startup and that request's latency."""
+        if battery_id not in self.first_predictions:
+            self.first_predictions[battery_id] = {
+                'since_startup_s': round(self.uptime(), 4),
+                'request_s': round(request_seconds, 4),
+            }
+
+    def report(self):
+        return {
+            'status': 'ready' if self.done else 'warming_up',
+            'uptime_s': round(self.uptime(), 4),
+            'warmup_s': round(self.finished_at - self.started_at, 4) if self.done else None,
+            'framework_import_s': self.framework_import_s,
+            'batteries': self.batteries,
+            'first_predictions': self.first_predictions,
+        }
@@ -1,55 +1,67 @@
 import streamlit as st
 import requests # To make requests to the FastAPI backend
-import pandas as pd
+from requests.adapters import HTTPAdapter
 import os
 import plotly.graph_objects as go # For plotting
 
 # --- Configuration ---
 API_BASE_URL = os.environ.get("API_BASE_URL", "http://127.0.0.1:5000") # Use port 5000 now
-DATA_DIR = '/app/data/processed_data/'
+REQUEST_TIMEOUT_S = float(os.environ.get("REQUEST_TIMEOUT_S", "30"))
+# Points of the plotted SoH trend (the backend downsamples longer histories); 0 plots every cycle
+TREND_MAX_POINTS = int(os.environ.get("TREND_MAX_POINTS", "500"))
+SUMMARY_CACHE_TTL_S = float(os.environ.get("SUMMARY_CACHE_TTL_S", "300"))
+
+# --- HTTP session shared by all user sessions: keeps connections to the backend open between requests ---
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 # --- Helper function to load battery cycle info ---
-@st.cache_data # Cache data to avoid reloading on every interaction
-def load_battery_data(battery_id):
-    """Loads cycle number and SoH for plotting."""
-    filename = os.path.join(DATA_DIR, f'optimized_nasa_battery_data_{battery_id}_preprocessed.csv')
-    if not os.path.exists(filename):
-        st.error(f"Data file not found for {battery_id}: {filename}")
-        return None
-    try:
-        df = pd.read_csv(filename)
-        if df.empty:
-            st.warning(f"No cycles found for {battery_id}")
-            return None
-        return df[['cycle_number', 'soh']].drop_duplicates().sort_values('cycle_number')
-    except Exception as e:
-        st.error(f"Error loading data for {battery_id}: {e}")
-        return None
+@st.cache_data(ttl=SUMMARY_CACHE_TTL_S) # Cache data to avoid refetching on every interaction (errors are not cached)
+def load_battery_summary(battery_id):
+    """Fetches the cycle list and the actual and predicted SoH trend from the backend."""
+    response = get_http_session().get(f"{API_BASE_URL}/summary/soh/{battery_id}",
+                                      params={"max_points": TREND_MAX_POINTS}, timeout=REQUEST_TIMEOUT_S)
+    response.raise_for_status()
+    return response.json()
 
 # --- Streamlit App Layout ---
 st.set_page_config(layout="wide")
 st.title("🔋 Battery State of Health (SoH) Predictor")
 
 st.sidebar.header("Select Battery and Cycle")
-available_batteries = ["B0005", "B0006", "B0018"] # Or detect from data dir
+available_batteries = ["B0005", "B0006", "B0018"] # Batteries with models on the backend
 selected_battery = st.sidebar.selectbox("Battery ID:", available_batteries)
 
-# Load data for the selected battery to get cycle range
-battery_cycle_data = load_battery_data(selected_battery)
+# Load the cycle summary for the selected battery to get cycle range
+try:
+    battery_summary = load_battery_summary(selected_battery)
+except requests.exceptions.RequestException as e:
+    battery_summary = None
+    st.error(f"Error loading the SoH summary for {selected_battery}: {e}")
+    st.error(f"Is the FastAPI server running at {API_BASE_URL}?")
 
-if battery_cycle_data is not None and not battery_cycle_data.empty:
-    min_cycle = int(battery_cycle_data['cycle_number'].min())
-    max_cycle = int(battery_cycle_data['cycle_number'].max())
+if battery_summary is not None and battery_summary['cycle_numbers']:
+    valid_cycles = battery_summary['cycle_numbers']
+    min_cycle = min(valid_cycles)
+    max_cycle = max(valid_cycles)
 
     # Select cycle
-    valid_cycles = battery_cycle_data['cycle_number'].unique()
     selected_cycle = st.sidebar.selectbox(f"Cycle Number ({min_cycle}-{max_cycle}):", valid_cycles)
+    show_predicted_trend = st.sidebar.checkbox("Overlay predicted SoH curve", value=True)
 
     # --- Display Actual SoH Trend ---
     st.subheader(f"Actual SoH Trend for {selected_battery}")
     fig_actual = go.Figure()
-    fig_actual.add_trace(go.Scatter(x=battery_cycle_data['cycle_number'], y=battery_cycle_data['soh'],
+    fig_actual.add_trace(go.Scatter(x=battery_summary['trend_cycles'], y=battery_summary['actual_soh'],
                                   mode='lines+markers', name='Actual SoH'))
+    if show_predicted_trend:
+        fig_actual.add_trace(go.Scatter(x=battery_summary['trend_cycles'], y=battery_summary['predicted_soh'],
+                                      mode='lines', name='Predicted SoH', line=dict(dash='dash')))
     fig_actual.update_layout(xaxis_title="Cycle Number", yaxis_title="SoH", yaxis_range=[0.5,1.1]) # Adjust range if needed
     st.plotly_chart(fig_actual, use_container_width=True)
 
@@ -62,7 +74,7 @@ if battery_cycle_data is not None and not battery_cycle_data.empty:
         st.subheader("Prediction Result")
         try:
             with st.spinner(f"Getting prediction for {selected_battery}, cycle {selected_cycle}..."):
-                response = requests.post(predict_url, json=payload)
+                response = get_http_session().post(predict_url, json=payload, timeout=REQUEST_TIMEOUT_S)
                 response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
 
             result = response.json()
@@ -87,10 +99,8 @@ if battery_cycle_data is not None and not battery_cycle_data.empty:
             except:
                 pass # Ignore if response isn't JSON or detail key doesn't exist
 
-elif battery_cycle_data is not None and battery_cycle_data.empty:
+elif battery_summary is not None:
      st.warning(f"No valid cycles found for {selected_battery}")
-else:
-     st.error(f"Could not load data for {selected_battery}")
 
 st.sidebar.markdown("---")
 st.sidebar.info("Select a battery and cycle, then click 'Predict SoH'.")
\ No newline at end of file
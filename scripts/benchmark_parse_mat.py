@@ -0,0 +1,85 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.io
+
+from data_utils import parse_nasa_mat_file, OPTIMIZED_SOURCE_COLUMNS
+
+
+def write_synthetic_mat_file(file_path, n_cycles=200, n_measurements=350, seed=0):
+    """
+    Writes a .mat file with the same structure as the NASA battery files
+    (charge, discharge and impedance cycles) filled with random values.
+    """
+    rng = np.random.default_rng(seed)
+    battery_id = os.path.basename(file_path).split('.')[0]
+    cycle_dtype = [('type', 'O'), ('ambient_temperature', 'O'), ('time', 'O'), ('data', 'O')]
+    cycles = np.empty((1, n_cycles), dtype=cycle_dtype)
+
+    for i in range(n_cycles):
+        cycle_type = ['charge', 'discharge', 'impedance'][i % 3]
+        n = int(n_measurements + rng.integers(-50, 50))
+        row = lambda: rng.normal(size=(1, n))  # noqa: E731
+        if cycle_type == 'charge':
+            fields = {'Voltage_measured': row(), 'Current_measured': row(), 'Temperature_measured': row(),
+                      'Current_charge': row(), 'Voltage_charge': row(), 'Time': np.cumsum(rng.random((1, n)), axis=1)}
+        elif cycle_type == 'discharge':
+            fields = {'Voltage_measured': row(), 'Current_measured': row(), 'Temperature_measured': row(),
+                      'Current_load': row(), 'Voltage_load': row(), 'Time': np.cumsum(rng.random((1, n)), axis=1),
+                      'Capacity': np.array([[1.8 + rng.random() * 0.2]])}
+        else:
+            fields = {'Sense_current': row(), 'Battery_current': row()}
+        data = np.empty((1, 1), dtype=[(name, 'O') for name in fields])
+        for name, value in fields.items():
+            data[0, 0][name] = value
+        cycles[0, i] = (np.array([cycle_type]), np.array([[24]], dtype=np.uint8), rng.random((1, 6)), data)
+
+    battery = np.empty((1, 1), dtype=[('cycle', 'O')])
+    battery[0, 0]['cycle'] = cycles
+    scipy.io.savemat(file_path, {battery_id: battery})
+
+
+def timed(func, repeats):
+    """Returns (result of the last call, best wall time in seconds)."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity check and timing of the vectorized .mat parser against the per-measurement loop.")
+    parser.add_argument("mat_files", nargs="*", help="NASA .mat files (a synthetic file is generated when omitted)")
+    parser.add_argument("--cycles", type=int, default=300, help="Cycles in the synthetic file")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mat_files = args.mat_files
+        if not mat_files:
+            synthetic_file = os.path.join(tmp_dir, "B0005.mat")
+            write_synthetic_mat_file(synthetic_file, n_cycles=args.cycles)
+            mat_files = [synthetic_file]
+
+        for mat_file in mat_files:
+            variants = [
+                ("all cycles, all columns", {}),
+                ("discharge only", {"discharge_only": True}),
+                ("discharge only, optimized columns", {"discharge_only": True, "columns": OPTIMIZED_SOURCE_COLUMNS}),
+            ]
+            for name, kwargs in variants:
+                df_loop, t_loop = timed(lambda: parse_nasa_mat_file(mat_file, vectorized=False, **kwargs), args.repeats)
+                df_vec, t_vec = timed(lambda: parse_nasa_mat_file(mat_file, vectorized=True, **kwargs), args.repeats)
+                pd.testing.assert_frame_equal(df_loop, df_vec)
+                print(f"{os.path.basename(mat_file)} [{name}]: {len(df_vec)} rows, parity OK | "
+                      f"loop {t_loop:.3f}s, vectorized {t_vec:.3f}s, speed-up {t_loop / t_vec:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,31 @@ import pandas as pd
 import os
 from tqdm import tqdm # Optional: for progress bar
 
-def parse_nasa_mat_file(file_path):
+# Output columns of parse_nasa_mat_file, in order
+PARSED_COLUMNS = [
+    'battery_id', 'cycle_number', 'cycle_type', 'ambient_temperature',
+    'measurement_time_relative', 'voltage_measured', 'current_measured', 'temperature_measured',
+    'voltage_load_or_charge', 'current_load_or_charge', 'capacity'
+]
+# Parsed columns needed to derive what optimize_csv.py keeps (smoothed signals, relative time and SoH from capacity)
+OPTIMIZED_SOURCE_COLUMNS = [
+    'cycle_number', 'measurement_time_relative', 'voltage_measured',
+    'current_measured', 'temperature_measured', 'capacity'
+]
+
+def parse_nasa_mat_file(file_path, discharge_only=False, columns=None, vectorized=True):
     """
     Parses a NASA battery dataset .mat file into a Pandas DataFrame.
     Handles variations in field names between charge and discharge cycles.
 
     Args:
         file_path (str): The full path to the .mat file.
+        discharge_only (bool): Only emit discharge cycles.
+        columns (list, optional): Only emit these columns (e.g. OPTIMIZED_SOURCE_COLUMNS).
+                                  All of PARSED_COLUMNS when None.
+        vectorized (bool): Build each cycle's columns directly from its NumPy arrays and
+                           concatenate once. False uses the original per-measurement dict
+                           loop, which gives identical output but is much slower.
 
     Returns:
         pandas.DataFrame: A DataFrame containing the structured time-series data
@@ -36,12 +54,16 @@ def parse_nasa_mat_file(file_path):
         num_cycles = cycle_array.shape[1]
         print(f"Found {num_cycles} cycles.")
 
-        all_measurements = []
+        all_measurements = [] # Per-measurement dicts (vectorized=False)
+        cycle_meta = [] # Per-cycle scalar values (vectorized=True)
+        cycle_arrays = [] # Per-cycle measurement arrays (vectorized=True)
 
         for i in tqdm(range(num_cycles), desc=f"Parsing {battery_id}"):
             cycle_struct = cycle_array[0, i]
 
             cycle_type = cycle_struct['type'][0]
+            if discharge_only and cycle_type != 'discharge':
+                continue
             ambient_temp = cycle_struct['ambient_temperature'][0][0].item() if isinstance(cycle_struct['ambient_temperature'][0], np.ndarray) else cycle_struct['ambient_temperature'][0]
             # cycle_time_epoch = cycle_struct['time'][0][0].item() if isinstance(cycle_struct['time'][0], np.ndarray) else cycle_struct['time'][0] # Less critical for now
 
@@ -119,6 +141,26 @@ def parse_nasa_mat_file(file_path):
                 print(f"Warning: Mismatched measurement lengths in cycle {i+1} ({cycle_type}) of {battery_id}. Skipping cycle data.")
                 continue
 
+            if vectorized:
+                # --- Keep the cycle's arrays; rows are built once for all cycles ---
+                cycle_meta.append({
+                    'battery_id': battery_id,
+                    'cycle_number': i + 1,
+                    'cycle_type': cycle_type,
+                    'ambient_temperature': ambient_temp,
+                    'capacity': cycle_capacity_value,
+                    'n_measurements': n_measurements
+                })
+                cycle_arrays.append({
+                    'measurement_time_relative': time_rel,
+                    'voltage_measured': voltage_m,
+                    'current_measured': current_m,
+                    'temperature_measured': temp_m,
+                    'voltage_load_or_charge': voltage_input,
+                    'current_load_or_charge': current_input
+                })
+                continue
+
             # --- Create dictionary per measurement ---
             for j in range(n_measurements):
                 measurement_dict = {
@@ -136,11 +178,17 @@ def parse_nasa_mat_file(file_path):
                 }
                 all_measurements.append(measurement_dict)
 
-        if not all_measurements:
+        if vectorized:
+            df = _build_measurement_frame(cycle_meta, cycle_arrays)
+        else:
+            df = pd.DataFrame(all_measurements) if all_measurements else None
+
+        if df is None:
             print(f"Warning: No measurements could be extracted from {file_path}.")
             return pd.DataFrame()
 
-        df = pd.DataFrame(all_measurements)
+        if columns is not None:
+            df = df[list(columns)]
         print(f"Finished processing {battery_id}. DataFrame shape: {df.shape}")
         return df
 
@@ -151,4 +199,97 @@ def parse_nasa_mat_file(file_path):
         print(f"An error occurred while parsing {file_path}: {e}")
         import traceback
         traceback.print_exc()
-        return None
\ No newline at end of file
+        return None
+
+
+def _build_measurement_frame(cycle_meta, cycle_arrays):
+    """
+    Builds the parsed DataFrame from per-cycle scalars and measurement arrays.
+
+    Per-cycle values are put in a small frame first so pandas infers the same
+    dtypes as it does for the per-measurement dicts, then repeated once per
+    measurement. Measurement columns are single concatenations.
+
+    Returns:
+        pandas.DataFrame: Rows in PARSED_COLUMNS order, or None if there are no measurements.
+    """
+    # Cycles without measurements add no rows (and must not influence dtypes)
+    keep = [k for k, meta in enumerate(cycle_meta) if meta['n_measurements'] > 0]
+    if not keep:
+        return None
+    cycle_meta = [cycle_meta[k] for k in keep]
+    cycle_arrays = [cycle_arrays[k] for k in keep]
+    lengths = np.array([meta['n_measurements'] for meta in cycle_meta], dtype=np.int64)
+
+    meta_df = pd.DataFrame(cycle_meta).drop(columns='n_measurements')
+    meta_df = meta_df.loc[meta_df.index.repeat(lengths)].reset_index(drop=True)
+
+    data = {}
+    for col in PARSED_COLUMNS:
+        if col in meta_df.columns:
+            data[col] = meta_df[col]
+        else:
+            data[col] = np.concatenate([arrays[col] for arrays in cycle_arrays])
+    return pd.DataFrame(data, columns=PARSED_COLUMNS)
+
+
+def clean_measurements(df, voltage_min=0.0, voltage_max=4.5):
+    """
+    Drops rows with missing measurements and replaces out-of-range voltages by
+    linear interpolation within each cycle (same steps as 2_data_preparation.ipynb).
+
+    Args:
+        df (pandas.DataFrame): Parsed measurements with 'cycle_number'.
+        voltage_min, voltage_max (float): Plausible physical voltage limits.
+
+    Returns:
+        pandas.DataFrame: The cleaned DataFrame.
+    """
+    df = df.dropna(subset=['voltage_measured', 'current_measured', 'temperature_measured']).copy()
+    outliers = (df['voltage_measured'] < voltage_min) | (df['voltage_measured'] > voltage_max)
+    if outliers.any():
+        df.loc[outliers, 'voltage_measured'] = np.nan
+        df['voltage_measured'] = df.groupby('cycle_number')['voltage_measured'].transform(
+            lambda x: x.interpolate(method='linear', limit_direction='both')
+        )
+        # Whole-cycle outliers cannot be interpolated
+        df['voltage_measured'] = df.groupby('cycle_number')['voltage_measured'].ffill().bfill()
+    return df
+
+
+def add_soh(df):
+    """
+    Adds 'soh': each discharge cycle's capacity divided by the capacity of the
+    battery's first discharge cycle, propagated to every measurement of the cycle.
+    """
+    df = df.copy()
+    df['capacity'] = pd.to_numeric(df['capacity'], errors='coerce')
+    discharge_capacity = df['capacity'] if 'cycle_type' not in df.columns else df['capacity'].where(df['cycle_type'] == 'discharge')
+    first_valid = discharge_capacity.first_valid_index()
+    initial_capacity = discharge_capacity.loc[first_valid] if first_valid is not None else np.nan
+
+    df['soh'] = np.nan
+    if pd.notna(initial_capacity) and initial_capacity > 0:
+        df['soh'] = discharge_capacity / initial_capacity
+    df['soh'] = df.groupby('cycle_number')['soh'].transform(lambda x: x.ffill().bfill())
+    return df
+
+
+def smooth_signals(df, columns=('voltage_measured', 'current_measured', 'temperature_measured'),
+                   window_length=11, polyorder=2):
+    """
+    Adds '<column>_smooth' columns with a Savitzky-Golay filter applied within
+    each cycle. Cycles shorter than the window keep their raw values.
+    """
+    from scipy.signal import savgol_filter
+
+    df = df.copy()
+    cycle_positions = df.groupby('cycle_number').indices
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        smoothed = values.copy()
+        for positions in cycle_positions.values():
+            if len(positions) >= window_length:
+                smoothed[positions] = savgol_filter(values[positions], window_length, polyorder, mode='interp')
+        df[f"{col}_smooth"] = smoothed
+    return df
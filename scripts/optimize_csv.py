@@ -1,10 +1,65 @@
 import pandas as pd
 import os
+import json
+import argparse
+import shutil
 import numpy as np
 
-def optimize_battery_csv(input_file, output_file):
+def columnar_dir_for(csv_file):
+    """Returns the columnar layout directory that sits next to an optimized CSV file."""
+    return os.path.splitext(csv_file)[0] + "_columns"
+
+def write_columnar_layout(df_optimized, output_dir):
+    """
+    Writes optimized battery data as a memory-mappable columnar layout.
+
+    Each column becomes one .npy file (float32, cycle_number as int32) with rows
+    sorted by cycle. `index_cycles.npy` and `index_offsets.npy` hold each cycle's
+    number and its row range, so readers can slice a cycle without scanning.
+
+    Args:
+        df_optimized (pd.DataFrame): Optimized data with a 'cycle_number' column.
+        output_dir (str): Directory to write the .npy files and meta.json into.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    df_sorted = df_optimized.sort_values('cycle_number', kind='stable')
+
+    for col in df_sorted.columns:
+        dtype = np.int32 if col == 'cycle_number' else np.float32
+        np.save(os.path.join(output_dir, f"{col}.npy"), df_sorted[col].to_numpy(dtype=dtype))
+
+    cycle_numbers = df_sorted['cycle_number'].to_numpy(dtype=np.int32)
+    cycles, starts = np.unique(cycle_numbers, return_index=True)
+    np.save(os.path.join(output_dir, "index_cycles.npy"), cycles)
+    np.save(os.path.join(output_dir, "index_offsets.npy"), np.append(starts, len(cycle_numbers)).astype(np.int64))
+
+    with open(os.path.join(output_dir, "meta.json"), "w") as f:
+        json.dump({"columns": list(df_sorted.columns), "n_rows": len(df_sorted), "n_cycles": len(cycles)}, f, indent=2)
+
+    size = sum(os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir)) / (1024 * 1024)
+    print(f"Saved columnar layout to {output_dir} ({size:.2f} MB)")
+
+# Essential columns to keep (based on actual usage in frontend and backend)
+ESSENTIAL_COLUMNS = [
+    'cycle_number',
+    'measurement_time_relative',  # Used in SEQUENCE_FEATURES
+    'voltage_measured_smooth',    # Used in SEQUENCE_FEATURES
+    'current_measured_smooth',    # Used in SEQUENCE_FEATURES
+    'temperature_measured_smooth', # Used in SEQUENCE_FEATURES
+    'soh'                        # Used for visualization/comparison
+]
+
+def select_essential_columns(df):
+    """Keeps only the ESSENTIAL_COLUMNS present in the DataFrame."""
+    # Filter columns that exist in the DataFrame
+    columns_to_keep = [col for col in ESSENTIAL_COLUMNS if col in df.columns]
+    return df[columns_to_keep]
+
+def optimize_battery_csv(input_file, output_file, write_columnar=True):
     """
     Optimize battery CSV file by keeping only necessary columns and removing redundant data.
+    Also writes the columnar layout read by the backend and frontend unless `write_columnar` is False,
+    in which case an existing layout is removed: it would still describe the previous CSV.
     """
     print(f"Processing {input_file}...")
     
@@ -14,21 +69,8 @@ def optimize_battery_csv(input_file, output_file):
     # Filter only discharge cycles
     df = df[df['cycle_type'] == 'discharge'].copy()
     
-    # Essential columns to keep (based on actual usage in frontend and backend)
-    essential_columns = [
-        'cycle_number',
-        'measurement_time_relative',  # Used in SEQUENCE_FEATURES
-        'voltage_measured_smooth',    # Used in SEQUENCE_FEATURES
-        'current_measured_smooth',    # Used in SEQUENCE_FEATURES
-        'temperature_measured_smooth', # Used in SEQUENCE_FEATURES
-        'soh'                        # Used for visualization/comparison
-    ]
-    
-    # Filter columns that exist in the DataFrame
-    columns_to_keep = [col for col in essential_columns if col in df.columns]
-    
     # Create optimized DataFrame
-    df_optimized = df[columns_to_keep]
+    df_optimized = select_essential_columns(df)
     
     # Save optimized DataFrame
     print(f"Saving optimized file to {output_file}")
@@ -37,6 +79,11 @@ def optimize_battery_csv(input_file, output_file):
     print(f"Optimized columns: {len(df_optimized.columns)}")
     
     df_optimized.to_csv(output_file, index=False)
+    if write_columnar:
+        write_columnar_layout(df_optimized, columnar_dir_for(output_file))
+    elif os.path.isdir(columnar_dir_for(output_file)):
+        shutil.rmtree(columnar_dir_for(output_file))
+        print(f"Removed stale columnar layout {columnar_dir_for(output_file)}")
     
     # Calculate and print size reduction
     original_size = os.path.getsize(input_file) / (1024 * 1024)  # Size in MB
@@ -49,7 +96,13 @@ def optimize_battery_csv(input_file, output_file):
     print("---")
 
 def main():
-    data_dir = "app/data/processed_data"
+    parser = argparse.ArgumentParser(description="Optimize preprocessed battery CSVs and write their columnar layout.")
+    parser.add_argument("--data-dir", default="app/data/processed_data")
+    parser.add_argument("--no-columnar", action="store_true", help="Only write the optimized CSV files")
+    parser.add_argument("--columnar-only", action="store_true",
+                        help="Convert existing optimized CSV files to the columnar layout without re-optimizing")
+    args = parser.parse_args()
+    data_dir = args.data_dir
     
     # Files to optimize
     files = [
@@ -63,8 +116,14 @@ def main():
         input_file = os.path.join(data_dir, file)
         output_file = os.path.join(data_dir, f"optimized_{file}")
         
-        if os.path.exists(input_file):
-            optimize_battery_csv(input_file, output_file)
+        if args.columnar_only:
+            if os.path.exists(output_file):
+                print(f"Converting {output_file}...")
+                write_columnar_layout(pd.read_csv(output_file), columnar_dir_for(output_file))
+            else:
+                print(f"File not found: {output_file}")
+        elif os.path.exists(input_file):
+            optimize_battery_csv(input_file, output_file, write_columnar=not args.no_columnar)
         else:
             print(f"File not found: {input_file}")
 
@@ -0,0 +1,183 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_utils import parse_nasa_mat_file, clean_measurements, add_soh, smooth_signals, OPTIMIZED_SOURCE_COLUMNS
+from optimize_csv import select_essential_columns, write_columnar_layout, columnar_dir_for
+
+MANIFEST_NAME = ".pipeline_manifest.json"
+STAGES = ["parse", "clean", "soh", "smooth", "optimize", "write"]
+PREPROCESSED_CSV_PATTERN = re.compile(r"^nasa_battery_data_(B\d+)_preprocessed\.csv$")
+
+
+def discover_inputs(input_dir):
+    """
+    Finds battery inputs in a directory.
+
+    Returns:
+        dict: battery_id -> input path. Raw .mat files take precedence over
+              already preprocessed CSVs of the same battery.
+    """
+    inputs = {}
+    for path in sorted(glob.glob(os.path.join(input_dir, "*.csv"))):
+        match = PREPROCESSED_CSV_PATTERN.match(os.path.basename(path))
+        if match:
+            inputs[match.group(1)] = path
+    for path in sorted(glob.glob(os.path.join(input_dir, "*.mat"))):
+        inputs[os.path.splitext(os.path.basename(path))[0]] = path
+    return inputs
+
+
+def output_paths(output_dir, battery_id):
+    csv_file = os.path.join(output_dir, f"optimized_nasa_battery_data_{battery_id}_preprocessed.csv")
+    return csv_file, columnar_dir_for(csv_file)
+
+
+def file_fingerprint(path, with_hash=False):
+    stat = os.stat(path)
+    fingerprint = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        fingerprint["sha256"] = sha.hexdigest()
+    return fingerprint
+
+
+def is_up_to_date(entry, input_path, outputs, use_hash):
+    """True when the outputs exist and the input matches its manifest entry (by mtime/size, or content hash)."""
+    if entry is None or not all(os.path.exists(path) for path in outputs):
+        return False
+    current = file_fingerprint(input_path)
+    if current["mtime_ns"] == entry["mtime_ns"] and current["size"] == entry["size"]:
+        return True
+    return use_hash and "sha256" in entry and file_fingerprint(input_path, with_hash=True)["sha256"] == entry["sha256"]
+
+
+def process_battery(battery_id, input_path, output_dir):
+    """
+    Runs parse -> clean -> SoH -> smooth -> optimize -> write for one battery.
+    Runs in a worker process.
+
+    Returns:
+        dict: battery_id, rows written and per-stage timings in seconds.
+    """
+    timings = {}
+
+    def stage(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    if input_path.endswith(".mat"):
+        # Discharge filtering happens while parsing
+        df = stage("parse", parse_nasa_mat_file, input_path, discharge_only=True, columns=OPTIMIZED_SOURCE_COLUMNS)
+        if df is None or df.empty:
+            raise ValueError(f"No discharge measurements parsed from {input_path}")
+        df = stage("clean", clean_measurements, df)
+        df = stage("soh", add_soh, df)
+        df = stage("smooth", smooth_signals, df)
+    else:
+        # Already cleaned, smoothed and with SoH: only filter
+        df = stage("parse", pd.read_csv, input_path)
+        df = df[df["cycle_type"] == "discharge"]
+
+    df_optimized = stage("optimize", select_essential_columns, df)
+    csv_file, columns_dir = output_paths(output_dir, battery_id)
+
+    def write():
+        df_optimized.to_csv(csv_file, index=False)
+        write_columnar_layout(df_optimized, columns_dir)
+    stage("write", write)
+
+    return {"battery_id": battery_id, "rows": len(df_optimized), "timings": timings}
+
+
+def print_summary(results, skipped, failed, wall_time):
+    print("\n=== Pipeline summary ===")
+    header = f"{'battery':<10}{'rows':>10}" + "".join(f"{name:>10}" for name in STAGES) + f"{'total':>10}"
+    print(header)
+    totals = dict.fromkeys(STAGES, 0.0)
+    for result in sorted(results, key=lambda r: r["battery_id"]):
+        timings = result["timings"]
+        for name in STAGES:
+            totals[name] += timings.get(name, 0.0)
+        print(f"{result['battery_id']:<10}{result['rows']:>10}"
+              + "".join(f"{timings.get(name, 0.0):>9.2f}s" for name in STAGES)
+              + f"{sum(timings.values()):>9.2f}s")
+    if results:
+        print(f"{'all':<10}{sum(r['rows'] for r in results):>10}"
+              + "".join(f"{totals[name]:>9.2f}s" for name in STAGES) + f"{sum(totals.values()):>9.2f}s")
+    print(f"Processed: {len(results)}, skipped (up to date): {len(skipped)}, failed: {len(failed)}")
+    for battery_id, error in failed:
+        print(f"  {battery_id} failed: {error}")
+    print(f"Wall time: {wall_time:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess every battery in a directory in parallel.")
+    parser.add_argument("--input-dir", default="data/raw_data", help="Directory with .mat files and/or preprocessed CSVs")
+    parser.add_argument("--output-dir", default="app/data/processed_data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--hash", action="store_true", help="Also compare content hashes when an input's mtime changed")
+    parser.add_argument("--force", action="store_true", help="Reprocess inputs even if outputs are up to date")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    inputs = discover_inputs(args.input_dir)
+    if not inputs:
+        print(f"No .mat or preprocessed CSV inputs found in {args.input_dir}")
+        return
+    print(f"Found {len(inputs)} batteries in {args.input_dir}")
+
+    to_process, skipped = {}, []
+    for battery_id, input_path in inputs.items():
+        entry = manifest.get(battery_id)
+        if entry is not None and entry.get("input") != os.path.abspath(input_path):
+            entry = None
+        if not args.force and is_up_to_date(entry, input_path, output_paths(args.output_dir, battery_id), args.hash):
+            skipped.append(battery_id)
+        else:
+            to_process[battery_id] = input_path
+
+    start = time.perf_counter()
+    results, failed = [], []
+    if to_process:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = {executor.submit(process_battery, battery_id, path, args.output_dir): battery_id
+                       for battery_id, path in to_process.items()}
+            for future in as_completed(futures):
+                battery_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed.append((battery_id, e))
+                    continue
+                results.append(result)
+                input_path = to_process[battery_id]
+                manifest[battery_id] = {"input": os.path.abspath(input_path),
+                                        **file_fingerprint(input_path, with_hash=args.hash)}
+                # Save after every battery so an interrupted run keeps its progress
+                with open(manifest_path, "w") as f:
+                    json.dump(manifest, f, indent=2)
+
+    print_summary(results, skipped, failed, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""The vectorized .mat parser produces exactly the DataFrame of the per-measurement loop."""
+import pandas as pd
+import pytest
+
+from benchmark_parse_mat import write_synthetic_mat_file
+from data_utils import parse_nasa_mat_file, OPTIMIZED_SOURCE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def mat_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("mat") / "B0005.mat"
+    write_synthetic_mat_file(str(path), n_cycles=30, n_measurements=80)
+    return str(path)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"discharge_only": True},
+    {"discharge_only": True, "columns": OPTIMIZED_SOURCE_COLUMNS},
+], ids=["all_cycles", "discharge_only", "optimized_columns"])
+def test_vectorized_parser_matches_loop(mat_file, kwargs):
+    expected = parse_nasa_mat_file(mat_file, vectorized=False, **kwargs)
+    actual = parse_nasa_mat_file(mat_file, vectorized=True, **kwargs)
+    assert len(actual) > 0
+    pd.testing.assert_frame_equal(expected, actual)
+
+
+def test_filters_apply(mat_file):
+    assert set(parse_nasa_mat_file(mat_file, discharge_only=True)["cycle_type"]) == {"discharge"}
+    optimized = parse_nasa_mat_file(mat_file, discharge_only=True, columns=OPTIMIZED_SOURCE_COLUMNS)
+    assert list(optimized.columns) == list(OPTIMIZED_SOURCE_COLUMNS)